@@ -0,0 +1,199 @@
+"""
+Bench Serialization - So sánh chi phí serialize/nén response của /predictions/ và /recommend/
+
+Mỗi payload được phục vụ qua hai route trên cùng app (cùng middleware):
+- legacy: ORM object + response_model (predictions), dict + jsonable_encoder (recommend)
+- fast:   endpoint thật của main (tuple -> dict + orjson), fast_response(dict)
+Đo CPU/request (process_time) và số byte trên đường truyền theo Accept-Encoding.
+/predictions/ chạy trên một SQLite tạm với dữ liệu sinh ngẫu nhiên.
+
+Usage:
+    python bench_serialization.py                        # in bảng so sánh
+    python bench_serialization.py --rows 1000 --requests 200
+    python bench_serialization.py --skip-recommend --json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+os.environ.setdefault("WARMUP_MODEL", "0")
+
+BACKEND_DIR = Path(__file__).parent
+ENCODINGS = ["identity", "gzip", "br"]
+
+
+def _fill_predictions(session_factory, rows: int, seed: int = 42):
+    import models
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with session_factory() as db:
+        db.add_all([
+            models.UdemyPrediction(
+                rating=round(rng.uniform(3, 5), 1), discount=round(rng.random(), 2),
+                num_reviews=rng.randint(0, 50_000), num_students=rng.randint(0, 500_000),
+                price=float(rng.randint(10, 200) * 10_000), total_length_minutes=rng.randint(30, 3000),
+                sections=rng.randint(1, 40), lectures=rng.randint(5, 400),
+                prediction=rng.choice(["Bestseller", "Not Bestseller"]), probability=rng.random(),
+                created_at=now - timedelta(minutes=i),
+            )
+            for i in range(rows)
+        ])
+        db.commit()
+
+
+def _recommend_payload(target_topic: str) -> Dict:
+    from sequential_mining import SequentialMiningRecommender
+
+    recommender = SequentialMiningRecommender(str(BACKEND_DIR / "data_final_fix.csv"))
+    result = recommender.get_full_recommendation(target_topic, courses_per_step=10)
+    result["shard"] = recommender.shard
+    return result
+
+
+def build_client(rows: int, recommend_topic: str = None):
+    """TestClient của main.app (DB tạm) kèm các route legacy để so sánh"""
+    from fastapi import Depends
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session, sessionmaker
+
+    import main
+    import models
+    from responses import fast_response
+    from schemas import UdemyPredictionResponse
+
+    db_path = Path(tempfile.mkdtemp()) / "bench.db"
+    bench_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=bench_engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+    _fill_predictions(session_factory, rows)
+
+    def get_bench_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[main.get_db] = get_bench_db
+
+    @main.app.get("/bench/legacy/predictions/", response_model=List[UdemyPredictionResponse])
+    async def legacy_predictions(skip: int = 0, limit: int = 100, db: Session = Depends(get_bench_db)):
+        return (
+            db.query(models.UdemyPrediction)
+            .order_by(models.UdemyPrediction.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    if recommend_topic:
+        payload = _recommend_payload(recommend_topic)
+
+        @main.app.get("/bench/legacy/recommend/")
+        async def legacy_recommend():
+            return payload
+
+        @main.app.get("/bench/fast/recommend/")
+        async def fast_recommend():
+            return fast_response(payload)
+
+    return TestClient(main.app)
+
+
+def measure(client, path: str, requests: int, warmup: int = 5) -> Dict:
+    """CPU ms/request (identity, không nén) và số byte theo từng Accept-Encoding"""
+    headers = {"accept-encoding": "identity"}
+    for _ in range(warmup):
+        client.get(path, headers=headers)
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+        response.raise_for_status()
+    cpu = (time.process_time() - cpu0) / requests
+    wall = (time.perf_counter() - wall0) / requests
+
+    sizes = {}
+    for encoding in ENCODINGS:
+        response = client.get(path, headers={"accept-encoding": encoding})
+        # br chỉ có khi đã cài brotli
+        if response.headers.get("content-encoding", "identity") == encoding:
+            sizes[encoding] = int(response.headers["content-length"])
+    return {"cpu_ms": cpu * 1000, "wall_ms": wall * 1000, "sizes": sizes}
+
+
+def run_bench(rows: int = 1000, requests: int = 100, recommend_topic: str = "Machine Learning") -> Dict:
+    client = build_client(rows, recommend_topic)
+    cases = {
+        "predictions legacy": f"/bench/legacy/predictions/?limit={rows}",
+        "predictions fast": f"/predictions/?limit={rows}",
+    }
+    if recommend_topic:
+        cases["recommend legacy"] = "/bench/legacy/recommend/"
+        cases["recommend fast"] = "/bench/fast/recommend/"
+
+    legacy_body = client.get(cases["predictions legacy"]).json()
+    fast_body = client.get(cases["predictions fast"]).json()
+    if legacy_body != fast_body:
+        raise RuntimeError("/predictions/ fast path trả khác legacy path")
+
+    return {
+        "rows": rows,
+        "requests": requests,
+        "results": {name: measure(client, path, requests) for name, path in cases.items()},
+    }
+
+
+def print_report(report: Dict):
+    print("=" * 72)
+    print(f"⚡ SERIALIZATION BENCH ({report['rows']} rows, {report['requests']} requests/case)")
+    print("=" * 72)
+    print(f"  {'case':<22}{'cpu ms/req':>12}{'wall ms/req':>13}"
+          + "".join(f"{encoding + ' B':>12}" for encoding in ENCODINGS))
+    for name, result in report["results"].items():
+        sizes = "".join(
+            f"{result['sizes'][encoding]:>12}" if encoding in result["sizes"] else f"{'-':>12}"
+            for encoding in ENCODINGS
+        )
+        print(f"  {name:<22}{result['cpu_ms']:>12.2f}{result['wall_ms']:>13.2f}{sizes}")
+    print("-" * 72)
+    results = report["results"]
+    for endpoint in ("predictions", "recommend"):
+        legacy, fast = results.get(f"{endpoint} legacy"), results.get(f"{endpoint} fast")
+        if legacy and fast:
+            identity = fast["sizes"]["identity"]
+            compressed = min(fast["sizes"].values())
+            print(f"  {endpoint:<12} CPU x{legacy['cpu_ms'] / fast['cpu_ms']:.1f} thấp hơn, "
+                  f"bytes {identity} -> {compressed} ({compressed / identity:.0%})")
+    print("=" * 72)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="So sánh chi phí serialize/nén response")
+    parser.add_argument("--rows", type=int, default=1000, help="Số prediction trả về mỗi request")
+    parser.add_argument("--requests", type=int, default=100, help="Số request đo cho mỗi case")
+    parser.add_argument("--topic", default="Machine Learning", help="target_topic cho payload /recommend/")
+    parser.add_argument("--skip-recommend", action="store_true", help="Bỏ qua /recommend/ (không build recommender)")
+    parser.add_argument("--json", action="store_true", help="In báo cáo dạng JSON")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    report = run_bench(args.rows, args.requests, None if args.skip_recommend else args.topic)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Bulk Score - Chấm điểm Bestseller offline cho toàn bộ catalogue CSV
+Đọc CSV theo chunk (catalogue.iter_catalogue), parse cột raw ("1,159,767", "81%", "42h 44m") bằng cùng
+quy tắc với SequentialMiningRecommender, chấm điểm song song trên process pool và
+ghi ra CSV/Parquet với bộ nhớ bị chặn (tối đa `workers * 2` chunk đang xử lý).
+
+Usage:
+    python bulk_score.py data_final_fix.csv scores.csv
+    python bulk_score.py catalogue.csv scores.parquet --chunksize 20000 --workers 4 --tier fast
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from catalogue import PREDICTION_FIELDS, iter_catalogue, to_prediction_features
+
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_ID_COLUMNS = ['course_url', 'title']
+
+# Model riêng của từng worker process (load một lần trong initializer)
+_worker_model = None
+
+
+def _init_worker():
+    global _worker_model
+    from ml_model import UdemyBestsellerModel
+    _worker_model = UdemyBestsellerModel(
+        model_path=str(BACKEND_DIR / 'model.pkl'),
+        scaler_path=str(BACKEND_DIR / 'scaler_final.pkl'),
+        fast_model_path=str(BACKEND_DIR / 'model_fast.pkl'),
+    )
+    _worker_model.load()
+
+
+def score_chunk(chunk: pd.DataFrame, tier: str = 'full', id_columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Chấm điểm một chunk catalogue đã parse (iter_catalogue / clean_catalogue).
+    Dòng không hợp lệ (thiếu dữ liệu / vi phạm ràng buộc PredictionInput) giữ lại
+    với bestseller_probability = NaN để output khớp 1-1 với input.
+    """
+    model = _worker_model
+    if model is None:
+        _init_worker()
+        model = _worker_model
+
+    id_columns = [c for c in (id_columns or DEFAULT_ID_COLUMNS) if c in chunk.columns]
+    out = chunk[id_columns].copy()
+
+    features = to_prediction_features(chunk)
+    out = out.join(features[PREDICTION_FIELDS])
+    out['bestseller_probability'] = np.nan
+    out['prediction'] = ''
+
+    if len(features):
+        p_bestseller = model.predict_proba_batch(features, tier=tier)
+        out.loc[features.index, 'bestseller_probability'] = p_bestseller
+        out.loc[features.index, 'prediction'] = np.where(
+            p_bestseller > 0.5, model.target_mapping[1], model.target_mapping[0]
+        )
+    return out
+
+
+class _OutputWriter:
+    """Ghi incremental ra CSV (append) hoặc Parquet (ParquetWriter, cần pyarrow)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self._writer = None
+        self._header = True
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("Ghi Parquet cần pyarrow: pip install pyarrow")
+
+    def write(self, df: pd.DataFrame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            df.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def bulk_score(input_path: str, output_path: str, chunksize: int = 5000,
+               workers: Optional[int] = None, tier: str = 'full',
+               id_columns: Optional[List[str]] = None) -> dict:
+    """
+    Stream input_path -> output_path, giữ nguyên thứ tự dòng.
+
+    Returns:
+        Thống kê: rows, scored, skipped, seconds, rows_per_second
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = _OutputWriter(output_path)
+    stats = {'rows': 0, 'scored': 0, 'skipped': 0}
+    t0 = time.perf_counter()
+
+    def collect(result: pd.DataFrame):
+        writer.write(result)
+        scored = int(result['bestseller_probability'].notna().sum())
+        stats['rows'] += len(result)
+        stats['scored'] += scored
+        stats['skipped'] += len(result) - scored
+        elapsed = time.perf_counter() - t0
+        print(f"  {stats['rows']:>10,} rows | {stats['rows'] / elapsed:>10,.0f} rows/s", file=sys.stderr)
+
+    # Giữ mọi cột của input (id_columns tùy chọn); cột catalogue đọc theo schema và parse sẵn
+    reader = iter_catalogue(input_path, chunksize=chunksize, usecols=None)
+    try:
+        if workers == 1:
+            for chunk in reader:
+                collect(score_chunk(chunk, tier, id_columns))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                # Giữ tối đa workers*2 chunk in-flight: bộ nhớ không phụ thuộc kích thước file
+                pending = deque()
+                for chunk in reader:
+                    pending.append(pool.submit(score_chunk, chunk, tier, id_columns))
+                    if len(pending) >= workers * 2:
+                        collect(pending.popleft().result())
+                while pending:
+                    collect(pending.popleft().result())
+    finally:
+        writer.close()
+
+    stats['seconds'] = time.perf_counter() - t0
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chấm điểm Bestseller cho catalogue CSV")
+    parser.add_argument("input", help="CSV catalogue raw (định dạng data_final_fix.csv)")
+    parser.add_argument("output", help="File output .csv hoặc .parquet")
+    parser.add_argument("--chunksize", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None, help="Số process (mặc định: số CPU)")
+    parser.add_argument("--tier", choices=['full', 'early_exit', 'fast'], default='full')
+    parser.add_argument("--id-columns", default=",".join(DEFAULT_ID_COLUMNS),
+                        help="Các cột định danh copy sang output (phân tách bằng dấu phẩy)")
+    args = parser.parse_args()
+
+    stats = bulk_score(args.input, args.output, args.chunksize, args.workers,
+                       args.tier, [c for c in args.id_columns.split(",") if c])
+
+    print("=" * 60)
+    print("📦 BULK SCORING REPORT")
+    print("=" * 60)
+    print(f"  Rows        : {stats['rows']:,}")
+    print(f"  Scored      : {stats['scored']:,}")
+    print(f"  Skipped     : {stats['skipped']:,} (thiếu dữ liệu / không hợp lệ)")
+    print(f"  Time        : {stats['seconds']:.2f}s")
+    print(f"  Throughput  : {stats['rows_per_second']:,.0f} rows/s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
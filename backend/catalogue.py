@@ -0,0 +1,164 @@
+"""
+Catalogue Module - Parse dữ liệu khóa học crawl được (data_final_fix.csv)
+Dùng chung cho sequential mining, distill model và các công cụ scoring offline.
+"""
+
+import hashlib
+import time
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+# 8 raw features của PredictionInput (đúng thứ tự)
+PREDICTION_FIELDS = [
+    'rating', 'discount', 'num_reviews', 'num_students',
+    'price', 'total_length_minutes', 'sections', 'lectures'
+]
+
+
+# Schema tường minh của catalogue crawl (data_final_fix.csv). Các cột số có định
+# dạng raw ("1,159,767", "81%", "42h 44m") đọc dưới dạng chuỗi rồi parse vector hóa.
+CATALOGUE_DTYPES = {
+    'course_url': 'str',
+    'title': 'str',
+    'headline': 'str',
+    'is_bestseller': 'str',
+    'rating': 'float64',
+    'num_reviews': 'str',
+    'num_students': 'str',
+    'instructor': 'str',
+    'language': 'str',
+    'price': 'float64',
+    'discount': 'str',
+    'related_topics': 'str',
+    'sections': 'float64',
+    'lectures': 'float64',
+    'total_length': 'str',
+}
+# Cột cần cho recommender / scoring (bỏ timestamp)
+CATALOGUE_COLUMNS = list(CATALOGUE_DTYPES)
+
+
+def parse_duration_series(durations: pd.Series) -> pd.Series:
+    """
+    Parse cả cột thời lượng: '42h 44m' -> 2564 (phút). Giờ và phút được tìm độc lập
+    ở bất kỳ đâu trong chuỗi (như re.search), nên 'Total: 5h 30m' -> 330.
+    """
+    text = durations.astype('string')
+    hours = text.str.extract(r'(\d+)h', expand=False).astype('float64').fillna(0)
+    minutes = text.str.extract(r'(\d+)m', expand=False).astype('float64').fillna(0)
+    total = (hours * 60 + minutes).where(durations.notna())
+    # int khi đủ dữ liệu, float (NaN) khi thiếu
+    return total.astype('int64') if total.notna().all() else total
+
+
+def _parse_formatted_number(values: pd.Series, strip: str) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+    text = values.astype('string').str.replace(strip, '', regex=False)
+    return pd.to_numeric(text, errors='coerce').astype('float64')
+
+
+def clean_catalogue(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Chuẩn hóa các cột raw của catalogue (in-place, vector hóa):
+    - num_students, num_reviews: "1,159,767" -> 1159767.0
+    - discount: "81%" -> 0.81
+    - total_length: "42h 44m" -> duration_minutes = 2564
+    """
+    if 'num_students' in df.columns:
+        df['num_students'] = _parse_formatted_number(df['num_students'], ',')
+    if 'num_reviews' in df.columns:
+        df['num_reviews'] = _parse_formatted_number(df['num_reviews'], ',')
+    if 'discount' in df.columns:
+        df['discount'] = _parse_formatted_number(df['discount'], '%') / 100
+    if 'total_length' in df.columns:
+        df['duration_minutes'] = parse_duration_series(df['total_length'])
+    return df
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow.csv  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _typed_columns(path, usecols):
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [c for c in (usecols or header) if c in header]
+    dtypes = {c: CATALOGUE_DTYPES[c] for c in columns if c in CATALOGUE_DTYPES}
+    return columns, dtypes
+
+
+def read_catalogue(path, usecols: Optional[List[str]] = CATALOGUE_COLUMNS,
+                   engine: str = 'auto') -> pd.DataFrame:
+    """
+    Đọc catalogue với schema tường minh + usecols, parse cột số/thời lượng vector hóa.
+
+    Args:
+        path: Đường dẫn CSV
+        usecols: Cột cần đọc (None = tất cả); cột không có trong file bị bỏ qua
+        engine: 'pyarrow' | 'c' | 'auto' (pyarrow nếu đã cài)
+    """
+    t0 = time.perf_counter()
+    columns, dtypes = _typed_columns(path, usecols)
+    if engine == 'auto':
+        engine = 'pyarrow' if _has_pyarrow() else 'c'
+    df = pd.read_csv(path, usecols=columns, dtype=dtypes, engine=engine)
+    clean_catalogue(df)
+    print(f"Loaded {len(df)} courses in {time.perf_counter() - t0:.3f}s (engine={engine})")
+    return df
+
+
+def iter_catalogue(path, chunksize: int = 50_000,
+                   usecols: Optional[List[str]] = CATALOGUE_COLUMNS) -> Iterator[pd.DataFrame]:
+    """
+    Stream catalogue theo chunk (bộ nhớ không phụ thuộc kích thước file), mỗi chunk
+    đã được parse như read_catalogue. In tổng số dòng và thời gian khi đọc xong.
+    """
+    t0 = time.perf_counter()
+    columns, dtypes = _typed_columns(path, usecols)
+    rows = 0
+    for chunk in pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize):
+        rows += len(chunk)
+        yield clean_catalogue(chunk)
+    print(f"Streamed {rows} courses in {time.perf_counter() - t0:.3f}s (chunksize={chunksize})")
+
+
+def to_prediction_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Chuyển catalogue đã clean thành 8 fields của PredictionInput.
+    Các dòng thiếu dữ liệu hoặc vi phạm ràng buộc của PredictionInput bị loại
+    (index gốc được giữ lại để join ngược về catalogue).
+    """
+    features = pd.DataFrame({
+        'rating': pd.to_numeric(df.get('rating'), errors='coerce'),
+        'discount': df.get('discount'),
+        'num_reviews': df.get('num_reviews'),
+        'num_students': df.get('num_students'),
+        'price': pd.to_numeric(df.get('price'), errors='coerce'),
+        'total_length_minutes': df.get('duration_minutes'),
+        'sections': pd.to_numeric(df.get('sections'), errors='coerce'),
+        'lectures': pd.to_numeric(df.get('lectures'), errors='coerce'),
+    }, index=df.index).astype(float)
+
+    valid = (
+        features.notna().all(axis=1)
+        & features['rating'].between(0, 5)
+        & features['discount'].between(0, 1)
+        & (features['num_reviews'] >= 0)
+        & (features['num_students'] >= 0)
+        & (features[['price', 'total_length_minutes', 'sections', 'lectures']] > 0).all(axis=1)
+    )
+    return features[valid]
+
+
+def file_version(path, chunk_size: int = 1 << 20) -> str:
+    """SHA-1 nội dung file - dùng làm data version (ETag, cache key)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -10,3 +10,15 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+
+def init_db():
+    """
+    Khởi tạo database một lần lúc khởi động: tạo bảng nếu chưa có.
+    Database mới được tạo với auto_vacuum=INCREMENTAL (phải đặt trước bảng đầu tiên)
+    để retention trả lại dung lượng; database cũ được chuyển bởi
+    retention.enable_incremental_vacuum.
+    """
+    with engine.begin() as conn:
+        if not conn.exec_driver_sql("PRAGMA page_count").scalar():
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        Base.metadata.create_all(bind=conn)
@@ -0,0 +1,156 @@
+"""
+Distill Model - Huấn luyện tier "fast" và calibrate tier "early_exit"
+Teacher: model.pkl (GradientBoostingClassifier 200 stages)
+Data: features sinh từ data_final_fix.csv (cùng quy tắc parse với SequentialMiningRecommender)
+
+Student: GradientBoostingRegressor nông, hồi quy trên log-odds của teacher,
+nên P(Bestseller) = sigmoid(student(X)) bám sát xác suất của teacher.
+
+Output:
+- model_fast.pkl          : {'fast_model', 'early_exit_margins', 'early_exit_block', 'latency_ms'}
+- model_fast_report.json  : agreement + latency đo được so với full model
+
+Usage:
+    python distill_model.py
+    python distill_model.py --n-estimators 100 --max-depth 5
+"""
+
+import argparse
+import json
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+
+from catalogue import read_catalogue, to_prediction_features
+from inference_tiers import EarlyExitGradientBoosting, PackedTreeEnsemble
+from ml_model import UdemyBestsellerModel, RAW_FEATURE_NAMES
+
+
+def calibrate_early_exit_margins(packed: PackedTreeEnsemble, X: np.ndarray) -> np.ndarray:
+    """
+    margins[k] = max |tổng đóng góp của các stage từ k trở đi| trên tập calibrate.
+    Chặt hơn nhiều so với cận tuyệt đối (tổng max |leaf|) nên early exit dừng sớm hơn,
+    nhưng chỉ là cận thực nghiệm: label_agreement trên holdout (report) là mức khớp đo được.
+    """
+    contributions = np.column_stack([packed._leaf_values(X, t, t + 1) for t in range(packed.n_trees)])
+    remaining = np.cumsum(contributions[:, ::-1], axis=1)[:, ::-1]
+    return np.concatenate([np.abs(remaining).max(axis=0), [0.0]])
+
+
+def _measure_latency_ms(predict_one, rows, repeats: int = 200) -> float:
+    """Median latency (ms) cho một request đơn dòng"""
+    timings = []
+    for i in range(repeats):
+        row = rows[i % len(rows)]
+        t0 = time.perf_counter()
+        predict_one(row)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(timings))
+
+
+def _agreement(p_full: np.ndarray, p_tier: np.ndarray) -> dict:
+    return {
+        "label_agreement": float(((p_full > 0.5) == (p_tier > 0.5)).mean()),
+        "mean_abs_prob_diff": float(np.abs(p_full - p_tier).mean()),
+        "max_abs_prob_diff": float(np.abs(p_full - p_tier).max()),
+    }
+
+
+def distill(data_path: str = "data_final_fix.csv", output_path: str = "model_fast.pkl",
+            report_path: str = "model_fast_report.json", n_estimators: int = 60,
+            max_depth: int = 4, learning_rate: float = 0.2, holdout: float = 0.2,
+            early_exit_block: int = 10, seed: int = 42) -> dict:
+    teacher = UdemyBestsellerModel(fast_model_path="")
+    teacher.load()
+
+    features = to_prediction_features(read_catalogue(data_path))
+    X = teacher.preprocess_batch(features)
+    print(f"Distill trên {len(X)} khóa học từ {data_path}")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        teacher_raw = teacher.model.decision_function(pd.DataFrame(X, columns=teacher.FEATURE_NAMES))
+    p_full = 1.0 / (1.0 + np.exp(-teacher_raw))
+
+    order = np.random.RandomState(seed).permutation(len(X))
+    n_holdout = int(len(X) * holdout)
+    holdout_idx, train_idx = order[:n_holdout], order[n_holdout:]
+
+    # Student: hồi quy trên log-odds của teacher
+    student = GradientBoostingRegressor(
+        n_estimators=n_estimators, max_depth=max_depth,
+        learning_rate=learning_rate, random_state=seed
+    )
+    student.fit(X[train_idx], teacher_raw[train_idx])
+    fast = PackedTreeEnsemble(student)
+
+    # Early exit: margins calibrate trên tập train, đánh giá trên holdout
+    packed_teacher = PackedTreeEnsemble(teacher.model)
+    margins = calibrate_early_exit_margins(packed_teacher, X[train_idx])
+    early_exit = EarlyExitGradientBoosting(teacher.model, margins=margins, block=early_exit_block)
+    _, stages_used = packed_teacher.raw_early_exit(X[holdout_idx], early_exit_block, margins)
+
+    # Latency đơn dòng end-to-end (feature engineering + scoring)
+    raw_rows = features.to_dict('records')
+    latency_ms = {
+        "full": _measure_latency_ms(
+            lambda row: teacher.model.predict_proba(pd.DataFrame(
+                teacher.preprocess_batch(row), columns=teacher.FEATURE_NAMES)), raw_rows),
+        "early_exit": _measure_latency_ms(lambda row: early_exit.predict_proba(teacher.preprocess_batch(row)), raw_rows),
+        "fast": _measure_latency_ms(lambda row: fast.predict_proba(teacher.preprocess_batch(row)), raw_rows),
+    }
+
+    report = {
+        "teacher": {"path": teacher.model_path, "type": type(teacher.model).__name__,
+                    "n_estimators": int(packed_teacher.n_trees)},
+        "student": {"type": type(student).__name__, "n_estimators": n_estimators,
+                    "max_depth": max_depth, "learning_rate": learning_rate},
+        "data": {"path": data_path, "rows": int(len(X)), "holdout_rows": int(n_holdout)},
+        "holdout": {
+            "fast": _agreement(p_full[holdout_idx], fast.predict_proba(X[holdout_idx])),
+            "early_exit": {
+                **_agreement(p_full[holdout_idx], early_exit.predict_proba(X[holdout_idx])),
+                "mean_stages_used": float(stages_used.mean()),
+            },
+        },
+        "single_row_latency_ms": latency_ms,
+    }
+
+    joblib.dump({
+        "fast_model": student,
+        "early_exit_margins": margins,
+        "early_exit_block": early_exit_block,
+        "latency_ms": latency_ms,
+        "raw_feature_names": RAW_FEATURE_NAMES,
+    }, output_path)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print(f"✓ Đã lưu {output_path} và {report_path}")
+    print(json.dumps(report["holdout"], indent=2))
+    print(json.dumps(latency_ms, indent=2))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill model nhanh từ model.pkl")
+    parser.add_argument("--data", default="data_final_fix.csv")
+    parser.add_argument("--output", default="model_fast.pkl")
+    parser.add_argument("--report", default="model_fast_report.json")
+    parser.add_argument("--n-estimators", type=int, default=60)
+    parser.add_argument("--max-depth", type=int, default=4)
+    parser.add_argument("--learning-rate", type=float, default=0.2)
+    parser.add_argument("--early-exit-block", type=int, default=10)
+    args = parser.parse_args()
+
+    distill(args.data, args.output, args.report, args.n_estimators,
+            args.max_depth, args.learning_rate, early_exit_block=args.early_exit_block)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Inference Tiers - Các tầng suy luận đánh đổi độ chính xác lấy độ trễ
+- full:       model.pkl qua sklearn (chính xác tuyệt đối)
+- early_exit: duyệt từng khối stage của GradientBoosting, dừng khi |raw| vượt
+              margin của phần còn lại. Margins calibrate thực nghiệm (model_fast.pkl)
+              nên nhãn chỉ khớp full trên dữ liệu giống tập calibrate: đo được 100%
+              trên holdout 1966 dòng của catalogue (model_fast_report.json), không phải
+              đảm bảo tuyệt đối; xác suất lệch full (trung bình ~0.02). Chỉ khi
+              margins=None (cận tuyệt đối) nhãn mới chắc chắn giống full.
+- fast:       model distill nhỏ (model_fast.pkl, xem distill_model.py)
+model_fast.pkl chứa cả model distill lẫn margins đã calibrate cho early_exit.
+Cả early_exit và fast đều chạy trên numpy thuần để tránh overhead validate của sklearn.
+"""
+
+import numpy as np
+import warnings
+from typing import Optional, Tuple
+
+# Thứ tự từ chính xác nhất -> nhanh nhất
+INFERENCE_TIERS = ['full', 'early_exit', 'fast']
+
+
+def _expit(raw: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-raw))
+
+
+class PackedTreeEnsemble:
+    """
+    Ensemble cây hồi quy (estimators_ của GradientBoosting) được đóng gói thành
+    các mảng numpy [n_trees, max_nodes] để duyệt vector hóa trên nhiều cây cùng lúc.
+
+    raw(X) = offset + sum_t learning_rate * value_t(leaf_t(X))
+    """
+
+    def __init__(self, gb_model):
+        trees = [est.tree_ for est in np.asarray(gb_model.estimators_)[:, 0]]
+        n_trees = len(trees)
+        max_nodes = max(t.node_count for t in trees)
+
+        self.n_trees = n_trees
+        self.depth = max(t.max_depth for t in trees)
+        self.feature = np.zeros((n_trees, max_nodes), dtype=np.intp)
+        self.threshold = np.zeros((n_trees, max_nodes), dtype=np.float64)
+        self.left = np.zeros((n_trees, max_nodes), dtype=np.intp)
+        self.right = np.zeros((n_trees, max_nodes), dtype=np.intp)
+        self.value = np.zeros((n_trees, max_nodes), dtype=np.float64)
+
+        for i, tree in enumerate(trees):
+            n = tree.node_count
+            nodes = np.arange(n)
+            is_leaf = tree.children_left == -1
+            self.feature[i, :n] = np.where(is_leaf, 0, tree.feature)
+            self.threshold[i, :n] = tree.threshold
+            # Lá trỏ về chính nó để vòng duyệt cố định `depth` bước không cần rẽ nhánh
+            self.left[i, :n] = np.where(is_leaf, nodes, tree.children_left)
+            self.right[i, :n] = np.where(is_leaf, nodes, tree.children_right)
+            self.value[i, :n] = tree.value[:, 0, 0] * gb_model.learning_rate
+
+        # Cận trên đóng góp |raw| của các cây từ stage k trở đi
+        max_abs = np.abs(self.value).max(axis=1)
+        self.remaining_bound = np.concatenate([np.cumsum(max_abs[::-1])[::-1], [0.0]])
+
+        # init_ (prior) là hằng số: suy ra offset từ một điểm bất kỳ
+        probe = np.zeros((1, gb_model.n_features_in_))
+        self.offset = 0.0
+        self.offset = float(self._decision(gb_model, probe) - self.raw(probe)[0])
+
+    @staticmethod
+    def _decision(gb_model, X) -> float:
+        # Model fit trên DataFrame: bỏ qua warning thiếu feature names khi probe bằng ndarray
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            if hasattr(gb_model, 'decision_function'):
+                return float(np.ravel(gb_model.decision_function(X))[0])
+            return float(np.ravel(gb_model.predict(X))[0])
+
+    def _leaf_values(self, X: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """Tổng giá trị lá của các cây [start, stop) cho từng dòng của X"""
+        # sklearn so sánh trên float32
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        tree_idx = np.arange(start, stop)[None, :]
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.zeros((X.shape[0], stop - start), dtype=np.intp)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[tree_idx, node]] <= self.threshold[tree_idx, node]
+            node = np.where(go_left, self.left[tree_idx, node], self.right[tree_idx, node])
+        return self.value[tree_idx, node].sum(axis=1)
+
+    def raw(self, X: np.ndarray) -> np.ndarray:
+        return self.offset + self._leaf_values(X, 0, self.n_trees)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """P(class=1), dùng cho model distill (hồi quy trên log-odds của teacher)"""
+        return _expit(self.raw(X))
+
+    def raw_early_exit(self, X: np.ndarray, block: int = 10,
+                       margins: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cộng dồn từng khối `block` stage; một dòng dừng lại khi |raw| lớn hơn
+        đóng góp tối đa của các stage còn lại, tức dấu (nhãn) đã quyết định.
+
+        Args:
+            margins: margins[k] = cận |tổng đóng góp từ stage k| quan sát được trên tập
+                     calibrate (xem distill_model.py) - dòng ngoài phân phối đó có thể
+                     dừng sai nhãn. None = cận tuyệt đối (tổng max |leaf|): luôn khớp
+                     nhãn full nhưng hiếm khi dừng sớm
+
+        Returns:
+            (raw, stages_used) cho từng dòng
+        """
+        bound = self.remaining_bound if margins is None else margins
+        X = np.asarray(X, dtype=np.float64)
+        raw = np.full(X.shape[0], self.offset)
+        stages_used = np.zeros(X.shape[0], dtype=np.int32)
+        active = np.arange(X.shape[0])
+
+        for start in range(0, self.n_trees, block):
+            stop = min(start + block, self.n_trees)
+            raw[active] += self._leaf_values(X[active], start, stop)
+            stages_used[active] = stop
+            undecided = np.abs(raw[active]) <= bound[stop]
+            active = active[undecided]
+            if active.size == 0:
+                break
+        return raw, stages_used
+
+
+class EarlyExitGradientBoosting:
+    """
+    Tầng early_exit cho GradientBoostingClassifier nhị phân (log_loss).
+    Có margins: nhãn khớp full theo calibrate (thực nghiệm); margins=None: khớp tuyệt đối.
+    """
+
+    def __init__(self, gb_model, margins: Optional[np.ndarray] = None, block: int = 10):
+        self.packed = PackedTreeEnsemble(gb_model)
+        # margins calibrate cho model khác (số stage không khớp) -> dùng cận tuyệt đối
+        if margins is not None and len(margins) != self.packed.n_trees + 1:
+            margins = None
+        self.margins = margins
+        self.block = block
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        raw, _ = self.packed.raw_early_exit(X, self.block, self.margins)
+        return _expit(raw)
+
+
+def supports_early_exit(model) -> bool:
+    """Chỉ GradientBoostingClassifier nhị phân với init hằng số mới dùng được early_exit"""
+    estimators = getattr(model, 'estimators_', None)
+    return (
+        type(model).__name__ == 'GradientBoostingClassifier'
+        and estimators is not None
+        and np.asarray(estimators).ndim == 2
+        and np.asarray(estimators).shape[1] == 1
+    )
@@ -0,0 +1,344 @@
+"""
+Load Test - Sinh traffic hỗn hợp tới API và báo cáo latency percentiles
+Replay /predict/, /predictions/, /recommend/, /search/, /stats/ theo tỉ lệ cấu hình,
+payload lấy từ data_final_fix.csv.
+
+Chế độ:
+- closed loop (mặc định): `--concurrency` client, mỗi client gửi request liên tục
+- open loop (`--rate`):   request được lên lịch đều theo RPS mục tiêu; latency tính
+                          từ thời điểm lên lịch (tránh coordinated omission)
+- sweep (`--sweep`):      chạy closed loop với nhiều mức concurrency, tìm "knee"
+                          của đường cong latency (mức có power = throughput/p95 lớn nhất)
+
+Usage:
+    python loadtest.py                                    # tự khởi động app local
+    python loadtest.py --url http://localhost:8000 --concurrency 16 --duration 30
+    python loadtest.py --rate 200 --duration 20 --mix predict=6,stats=2,search=2
+    python loadtest.py --sweep 1,2,4,8,16,32 --duration 10 --json sweep.json
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import pandas as pd
+
+from catalogue import clean_catalogue, to_prediction_features
+
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_MIX = "predict=4,predictions=2,recommend=1,search=2,stats=1"
+ENDPOINTS = ["predict", "predictions", "recommend", "search", "stats"]
+
+
+# ============== PAYLOADS ==============
+
+class PayloadPool:
+    """Payload thực tế sinh từ catalogue CSV"""
+
+    def __init__(self, data_path: Path, seed: int = 42):
+        df = clean_catalogue(pd.read_csv(data_path))
+        features = to_prediction_features(df)
+        int_fields = ['num_reviews', 'num_students', 'total_length_minutes', 'sections', 'lectures']
+        features[int_fields] = features[int_fields].astype(int)
+        self.predict_bodies = features.to_dict('records')
+
+        topics = df.get('related_topics', pd.Series(dtype=str)).dropna().str.split(',').explode().str.strip()
+        self.topics = [t for t in topics.value_counts().index[:50] if t]
+        words = df.get('title', pd.Series(dtype=str)).dropna().str.lower().str.findall(r"[a-z]{4,}").explode()
+        self.keywords = list(words.value_counts().index[:200])
+        self.random = random.Random(seed)
+
+    def request(self, endpoint: str) -> Tuple[str, str, Optional[dict]]:
+        """(method, path, json_body) cho một endpoint"""
+        r = self.random
+        if endpoint == "predict":
+            return "POST", "/predict/", r.choice(self.predict_bodies)
+        if endpoint == "predictions":
+            return "GET", f"/predictions/?limit={r.choice([10, 50, 100])}", None
+        if endpoint == "recommend":
+            return "POST", "/recommend/", {"target_topic": r.choice(self.topics), "courses_per_step": 3}
+        if endpoint == "search":
+            return "GET", f"/search/?keyword={quote(r.choice(self.keywords))}&limit=10", None
+        return "GET", "/stats/", None
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Endpoint không hợp lệ trong --mix: {name} (chọn trong {ENDPOINTS})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# ============== CLIENT ==============
+
+class Client:
+    """Một kết nối HTTP keep-alive (mỗi worker thread một client)"""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.timeout = timeout
+        self.conn = None
+
+    def send(self, method: str, path: str, body: Optional[dict]) -> int:
+        if self.conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.conn = cls(self.host, self.port, timeout=self.timeout)
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        try:
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            raise
+
+
+class Recorder:
+    """Thu thập (endpoint, latency, ok) thread-safe"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float, ok: bool):
+        with self._lock:
+            self.samples[endpoint].append(latency)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def _execute(client: Client, payloads: PayloadPool, endpoint: str, recorder: Recorder, started: float):
+    method, path, body = payloads.request(endpoint)
+    try:
+        ok = client.send(method, path, body) < 400
+    except Exception:
+        ok = False
+    recorder.record(endpoint, time.perf_counter() - started, ok)
+
+
+def _pick(mix: Dict[str, float], rng: random.Random) -> str:
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def run_closed_loop(base_url: str, payloads: PayloadPool, mix: Dict[str, float],
+                    concurrency: int, duration: float) -> Tuple[Recorder, float]:
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def worker(seed: int):
+        client, rng = Client(base_url), random.Random(seed)
+        while time.perf_counter() < deadline:
+            _execute(client, payloads, _pick(mix, rng), recorder, time.perf_counter())
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return recorder, time.perf_counter() - t0
+
+
+def run_open_loop(base_url: str, payloads: PayloadPool, mix: Dict[str, float],
+                  rate: float, duration: float, max_concurrency: int) -> Tuple[Recorder, float]:
+    recorder = Recorder()
+    local = threading.local()
+    rng = random.Random(0)
+
+    def task(endpoint: str, scheduled: float):
+        if not hasattr(local, "client"):
+            local.client = Client(base_url)
+        _execute(local.client, payloads, endpoint, recorder, scheduled)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        n = int(rate * duration)
+        for i in range(n):
+            scheduled = t0 + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(task, _pick(mix, rng), scheduled)
+    return recorder, time.perf_counter() - t0
+
+
+# ============== REPORT ==============
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    # nearest-rank
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, dict]:
+    summary = {}
+    all_latencies, all_errors = [], 0
+    for endpoint, latencies in sorted(recorder.samples.items()):
+        values = sorted(latencies)
+        all_latencies.extend(values)
+        all_errors += recorder.errors[endpoint]
+        summary[endpoint] = _stats(values, recorder.errors[endpoint], elapsed)
+    summary["ALL"] = _stats(sorted(all_latencies), all_errors, elapsed)
+    return summary
+
+
+def _stats(values: List[float], errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(values),
+        "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+        "error_rate": errors / len(values) if values else 0.0,
+        "p50_ms": _percentile(values, 50) * 1000,
+        "p95_ms": _percentile(values, 95) * 1000,
+        "p99_ms": _percentile(values, 99) * 1000,
+    }
+
+
+def print_summary(summary: Dict[str, dict], title: str):
+    print("=" * 86)
+    print(f"📈 {title}")
+    print("=" * 86)
+    print(f"  {'endpoint':<14}{'requests':>10}{'rps':>10}{'errors':>9}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}")
+    for endpoint, s in summary.items():
+        print(f"  {endpoint:<14}{s['requests']:>10}{s['throughput_rps']:>10.1f}{s['error_rate']:>8.1%}"
+              f"{s['p50_ms']:>11.1f}{s['p95_ms']:>11.1f}{s['p99_ms']:>11.1f}")
+    print("=" * 86)
+
+
+def find_knee(levels: List[dict]) -> dict:
+    """Knee = mức concurrency có power (throughput / p95) lớn nhất"""
+    return max(levels, key=lambda lv: lv["ALL"]["throughput_rps"] / max(lv["ALL"]["p95_ms"], 1e-9))
+
+
+# ============== LOCAL SERVER ==============
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def local_app(workers: int = 1, timeout: float = 60.0) -> Iterator[str]:
+    """
+    Chạy uvicorn main:app trong một thư mục tạm (symlink tới model artifacts),
+    nên SQLite udemy_predictions.db của load test không đụng tới DB dev.
+    Yield base URL; khi thoát: dừng app và xóa thư mục tạm.
+    """
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        for name in ["model.pkl", "scaler_final.pkl", "model_fast.pkl"]:
+            if (BACKEND_DIR / name).exists():
+                os.symlink(BACKEND_DIR / name, Path(workdir) / name)
+        port = _free_port()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(BACKEND_DIR),
+             "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+            cwd=workdir, stdout=subprocess.DEVNULL,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            deadline = time.time() + timeout
+            while True:
+                try:
+                    if Client(base_url, timeout=1).send("GET", "/", None) == 200:
+                        break
+                except OSError:
+                    time.sleep(0.2)
+                if time.time() >= deadline:
+                    raise RuntimeError("App local không khởi động kịp")
+            yield base_url
+        finally:
+            # App phải dừng hẳn trước khi xóa thư mục tạm (SQLite đang mở trong đó)
+            proc.terminate()
+            proc.wait()
+
+
+def warm_up(base_url: str, payloads: PayloadPool, mix: Dict[str, float]):
+    """Gọi mỗi endpoint một lần (model load, build recommender) trước khi đo"""
+    client = Client(base_url, timeout=120)
+    for endpoint in mix:
+        try:
+            client.send(*payloads.request(endpoint))
+        except Exception:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test API với traffic hỗn hợp")
+    parser.add_argument("--url", default=None, help="URL API đích (mặc định: tự khởi động app local)")
+    parser.add_argument("--app-workers", type=int, default=1, help="Số uvicorn worker khi chạy app local")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Tỉ lệ endpoint, vd predict=4,stats=1")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=None, help="RPS mục tiêu (open loop)")
+    parser.add_argument("--duration", type=float, default=15.0, help="Giây cho mỗi lần chạy")
+    parser.add_argument("--sweep", default=None, help="Danh sách concurrency, vd 1,2,4,8,16,32")
+    parser.add_argument("--data", default=str(BACKEND_DIR / "data_final_fix.csv"))
+    parser.add_argument("--json", default=None, help="Ghi báo cáo ra file JSON")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    payloads = PayloadPool(Path(args.data))
+
+    app = nullcontext(args.url) if args.url else local_app(args.app_workers)
+    with app as base_url:
+        report = {"base_url": base_url, "mix": mix}
+        warm_up(base_url, payloads, mix)
+
+        if args.sweep:
+            levels = []
+            for concurrency in [int(c) for c in args.sweep.split(",")]:
+                recorder, elapsed = run_closed_loop(base_url, payloads, mix, concurrency, args.duration)
+                summary = summarize(recorder, elapsed)
+                summary["concurrency"] = concurrency
+                levels.append(summary)
+                s = summary["ALL"]
+                print(f"  concurrency={concurrency:<4} rps={s['throughput_rps']:8.1f}  p50={s['p50_ms']:8.1f}ms  "
+                      f"p95={s['p95_ms']:8.1f}ms  p99={s['p99_ms']:8.1f}ms  errors={s['error_rate']:.1%}")
+            knee = find_knee(levels)
+            print(f"🎯 Knee: concurrency={knee['concurrency']} "
+                  f"({knee['ALL']['throughput_rps']:.1f} rps, p95={knee['ALL']['p95_ms']:.1f}ms)")
+            report.update({"sweep": levels, "knee_concurrency": knee["concurrency"]})
+        elif args.rate:
+            recorder, elapsed = run_open_loop(base_url, payloads, mix, args.rate, args.duration, args.concurrency * 8)
+            summary = summarize(recorder, elapsed)
+            print_summary(summary, f"OPEN LOOP {args.rate:.0f} rps x {args.duration:.0f}s")
+            report["summary"] = summary
+        else:
+            recorder, elapsed = run_closed_loop(base_url, payloads, mix, args.concurrency, args.duration)
+            summary = summarize(recorder, elapsed)
+            print_summary(summary, f"CLOSED LOOP concurrency={args.concurrency} x {args.duration:.0f}s")
+            report["summary"] = summary
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
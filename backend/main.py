@@ -1,12 +1,24 @@
-from fastapi import FastAPI, Depends, HTTPException
+import os
+import threading
+import time
+import numpy as np
+from fastapi import FastAPI, Depends, HTTPException, Header, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine
+from database import SessionLocal, engine, init_db
 import models
+from schemas import PredictionSweepRequest, PredictionSweepResponse, SweepAxisResult
 from schemas import UdemyPredictionBase, UdemyPredictionResponse
 from ml_model import PredictionInput, model as ml_model
-from sequential_mining import get_recommender
-from typing import List, Optional
+import profiling
+import responses
+import retention
+from responses import CompressionMiddleware, fast_response
+from typing import List, Literal, Optional
+from datetime import date
 from pydantic import BaseModel
 
 app = FastAPI(
@@ -15,8 +27,64 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Tạo bảng nếu chưa có
-models.Base.metadata.create_all(bind=engine)
+# Topic catalogue chỉ đổi khi data đổi: cho phép cache ngắn rồi revalidate bằng ETag
+TOPICS_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+
+# Tạo bảng nếu chưa có (database mới: bật incremental vacuum)
+init_db()
+
+# Cột của udemy_predictions theo đúng thứ tự field của UdemyPredictionResponse:
+# /predictions/ dựng dict thẳng từ tuple, không qua ORM object + response_model
+PREDICTION_RESPONSE_FIELDS = [
+    name for name in UdemyPredictionResponse.model_fields
+    if name in models.UdemyPrediction.__table__.columns
+]
+_PREDICTION_RESPONSE_COLUMNS = [models.UdemyPrediction.__table__.c[name] for name in PREDICTION_RESPONSE_FIELDS]
+
+
+@app.on_event("startup")
+def warm_up_model():
+    """Load model.pkl trong nền để healthcheck "/" trả lời ngay (tắt bằng WARMUP_MODEL=0)"""
+    if os.getenv("WARMUP_MODEL", "1") != "0":
+        ml_model.warm_up_in_background()
+
+
+@app.on_event("startup")
+def start_retention():
+    """Archive định kỳ prediction cũ hơn RETENTION_DAYS ngày (tắt khi không đặt)"""
+    if retention.RETENTION_DAYS:
+        retention.start_retention_thread(engine)
+
+
+@app.on_event("startup")
+def warm_up_recommender():
+    """Build recommender trong thread nền (tắt bằng WARMUP_RECOMMENDER=0)"""
+    if os.getenv("WARMUP_RECOMMENDER", "1") != "0":
+        threading.Thread(target=_warm_up_recommender, name="recommender-warmup", daemon=True).start()
+
+
+def _warm_up_recommender():
+    try:
+        get_sharded_recommender()
+    except Exception as e:
+        print(f"⚠️  Build recommender thất bại: {e}")
+
+
+# Các hàm dưới đây có thể build recommender (vài giây CPU) nên endpoint async
+# phải gọi qua run_in_threadpool, không gọi trực tiếp trên event loop.
+
+def get_sharded_recommender():
+    """
+    Import lazy sequential_mining (pandas pipeline, prefixspan) - chỉ /recommend/,
+    /topics/, /search/ và /similar/ cần tới, không nằm trên đường cold start.
+    """
+    from sequential_mining import get_sharded_recommender as _get_sharded_recommender
+    return _get_sharded_recommender()
+
+
+def get_recommender(language: Optional[str] = None, category: Optional[str] = None):
+    """Recommender toàn cục, hoặc shard tương ứng khi có filter language/category"""
+    return get_sharded_recommender().get(language=language, category=category)
 
 # ================== CORS CONFIG ==================
 # Các origin được phép gọi API
@@ -43,6 +111,19 @@ app.add_middleware(
 )
 # =================================================
 
+# Nén gzip/br cho response >= COMPRESSION_MIN_BYTES (tắt bằng COMPRESSION_MIN_BYTES=0)
+if responses.COMPRESSION_MIN_BYTES > 0:
+    app.add_middleware(CompressionMiddleware)
+
+# ================== PROFILING HOOK ==================
+# Bật bằng header "X-Profile: 1" (hoặc ?profile=1) kèm "X-Profile-Token" thuộc
+# PROFILE_ADMIN_TOKENS, hoặc tự động theo PROFILE_SAMPLE_RATE.
+# Profile lấy mẫu mọi thread (event loop + worker của run_in_threadpool), gắn tên thread;
+# các thread này dùng chung nên request chạy xen kẽ cũng xuất hiện trong profile
+# (số request chồng lấn trả về ở header X-Profile-Overlap).
+app.add_middleware(profiling.ProfilingMiddleware)
+# =================================================
+
 # Dependency để lấy database session
 def get_db():
     db = SessionLocal()
@@ -64,17 +145,40 @@ async def root():
     }
 
 
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """
+    Tải file profile theo id (trả về trong header X-Profile-Id), chỉ dành cho admin
+    """
+    if not profiling.is_admin(x_profile_token):
+        raise HTTPException(status_code=403, detail="Không có quyền truy cập profile")
+
+    path = profiling.find_profile(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy profile")
+
+    return FileResponse(path, filename=path.name)
+
+
 @app.post("/predict/", response_model=UdemyPredictionResponse)
-async def predict(input_data: PredictionInput, db: Session = Depends(get_db)):
+async def predict(
+    input_data: PredictionInput,
+    tier: Optional[Literal["full", "early_exit", "fast", "auto"]] = None,
+    latency_budget_ms: Optional[float] = Query(None, gt=0),
+    db: Session = Depends(get_db)
+):
     """
     Endpoint dự đoán khóa học Udemy có phải Bestseller không
 
     Input: 8 raw features (backend sẽ tự động feature engineering thành 12 features)
     Output: Bestseller hoặc Not Bestseller với xác suất
+
+    - **tier**: Inference tier ("full", "early_exit", "fast", "auto"; mặc định full)
+    - **latency_budget_ms**: Chọn tier chính xác nhất vừa budget (khi tier là auto/bỏ trống)
     """
     try:
         # Gọi model để dự đoán
-        result = ml_model.predict(input_data)
+        result = ml_model.predict(input_data, tier=tier, latency_budget_ms=latency_budget_ms)
 
         # Lưu vào database
         db_record = models.UdemyPrediction(
@@ -86,11 +190,49 @@ async def predict(input_data: PredictionInput, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(db_record)
 
-        return db_record
+        response = UdemyPredictionResponse.model_validate(db_record)
+        response.tier = result["tier"]
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi khi dự đoán: {str(e)}")
 
 
+@app.post("/predict/sweep/", response_model=PredictionSweepResponse)
+async def predict_sweep(
+    request: PredictionSweepRequest,
+    tier: Optional[Literal["full", "early_exit", "fast", "auto"]] = None,
+):
+    """
+    What-if sweep: xác suất Bestseller khi thay đổi 1-3 field (vd. price x discount)
+
+    Toàn bộ lưới scenario được chấm điểm trong một lần gọi model (vector hóa),
+    không lưu vào database.
+
+    - **base**: 8 raw features của khóa học gốc
+    - **axes**: {field: {"values": [...]} hoặc {"start", "stop", "num"}}
+    - **tier**: Inference tier ("full", "early_exit", "fast", "auto"; mặc định full)
+
+    Returns:
+        - axes: Giá trị từng trục (theo thứ tự gửi lên)
+        - probabilities: Lưới xác suất lồng nhau, shape = shape
+    """
+    try:
+        t0 = time.perf_counter()
+        selected_tier = ml_model.select_tier(tier)
+        axes = request.axis_values()
+        grid = ml_model.predict_sweep(request.base.model_dump(), axes, tier=selected_tier)
+        return PredictionSweepResponse(
+            axes=[SweepAxisResult(field=name, values=values.tolist()) for name, values in axes.items()],
+            shape=list(grid.shape),
+            probabilities=np.round(grid, 4).tolist(),
+            scenarios=int(grid.size),
+            tier=selected_tier,
+            elapsed_ms=round((time.perf_counter() - t0) * 1000, 3),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi khi chạy sweep: {str(e)}")
+
+
 @app.get("/predictions/", response_model=List[UdemyPredictionResponse])
 async def get_predictions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """
@@ -99,14 +241,33 @@ async def get_predictions(skip: int = 0, limit: int = 100, db: Session = Depends
     - **skip**: Số lượng bản ghi bỏ qua (pagination)
     - **limit**: Số lượng bản ghi tối đa trả về
     """
-    predictions = (
-        db.query(models.UdemyPrediction)
+    rows = db.execute(
+        select(*_PREDICTION_RESPONSE_COLUMNS)
         .order_by(models.UdemyPrediction.created_at.desc())
         .offset(skip)
         .limit(limit)
-        .all()
-    )
-    return predictions
+    ).all()
+    predictions = [dict(zip(PREDICTION_RESPONSE_FIELDS, row), tier=None) for row in rows]
+    return fast_response(predictions, model=List[UdemyPredictionResponse])
+
+
+@app.get("/predictions/export/")
+async def export_predictions(since: Optional[date] = None, until: Optional[date] = None):
+    """
+    Xuất prediction ra CSV, gồm cả phần đã archive (Parquet) và bảng hiện tại
+
+    - **since**: Từ ngày (YYYY-MM-DD, bao gồm)
+    - **until**: Đến ngày (YYYY-MM-DD, bao gồm)
+    """
+    def rows():
+        header = True
+        for frame in retention.iter_export_frames(engine, since, until):
+            yield frame.to_csv(header=header, index=False)
+            header = False
+
+    filename = f"predictions_{since or 'all'}_{until or 'now'}.csv"
+    return StreamingResponse(rows(), media_type="text/csv",
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 
 @app.get("/predictions/{prediction_id}", response_model=UdemyPredictionResponse)
@@ -166,6 +327,7 @@ async def get_stats(db: Session = Depends(get_db)):
 
     return {
         "total_predictions": total_predictions,
+        "archived_predictions": retention.archived_row_count(),
         "message": "Thống kê hệ thống"
     }
 
@@ -177,6 +339,8 @@ class RecommendationRequest(BaseModel):
     target_topic: str
     max_steps: Optional[int] = None
     courses_per_step: int = 3
+    language: Optional[str] = None
+    category: Optional[str] = None
 
 
 @app.post("/recommend/")
@@ -187,46 +351,132 @@ async def get_recommendations(request: RecommendationRequest):
     - **target_topic**: Topic/skill mục tiêu muốn học (e.g., "Machine Learning", "React JS")
     - **max_steps**: Số bước tối đa trong learning path (None = toàn bộ)
     - **courses_per_step**: Số khóa học recommend cho mỗi bước (default: 3)
+    - **language**: Chỉ lấy khóa học theo ngôn ngữ (e.g., "English")
+    - **category**: Chỉ lấy khóa học thuộc category cấp cao nhất (e.g., "Development", "IT & Software")
+
+    Có filter thì request chỉ chạy trên shard tương ứng (patterns và scoring riêng).
 
     Returns:
         - success: True/False
         - message: Thông báo
         - target_topic: Topic đã search
-        - path: Danh sách các topic trong learning path
+        - path: Danh sách các skill theo thứ tự prerequisite (path_type="skill_graph",
+          tính sẵn từ skill-transition graph), hoặc các mức difficulty (path_type="difficulty")
+        - target_skill: Skill đích trong graph (khi path_type="skill_graph")
         - total_steps: Tổng số bước
         - steps: Chi tiết từng bước với courses
+        - shard: Shard đã xử lý request ("global" nếu không có filter)
     """
-    try:
-        recommender = get_recommender()
+    def recommend():
+        recommender = get_recommender(language=request.language, category=request.category)
         result = recommender.get_full_recommendation(
             target_topic=request.target_topic,
             max_steps=request.max_steps,
             courses_per_step=request.courses_per_step
         )
+        result["shard"] = recommender.shard
         return result
+
+    try:
+        return fast_response(await run_in_threadpool(recommend))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi khi tạo recommendation: {str(e)}")
 
 
+@app.get("/recommend/shards/")
+async def get_recommender_shards():
+    """
+    Các shard recommender đã dựng (language/category, số khóa học, số patterns)
+    """
+    try:
+        sharded = await run_in_threadpool(get_sharded_recommender)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi khi lấy shards: {str(e)}")
+    return {"shard_by": sharded.shard_by, "shards": sharded.describe(), "build_seconds": sharded.build_seconds}
+
+
+@app.get("/similar/")
+async def get_similar_courses(
+    course_url: Optional[str] = None,
+    title: Optional[str] = None,
+    k: int = Query(10, ge=1, le=50),
+):
+    """
+    Khóa học tương tự một khóa học (TF-IDF full_content + skill overlap)
+
+    - **course_url**: URL khóa học (ưu tiên)
+    - **title**: Tên khóa học (không phân biệt hoa thường) nếu không có course_url
+    - **k**: Số khóa học trả về (tối đa bằng số neighbors đã tính sẵn)
+
+    Returns:
+        - course: Khóa học được hỏi
+        - similar: Danh sách khóa học tương tự, kèm similarity
+        - count: Số lượng kết quả
+    """
+    if not course_url and not title:
+        raise HTTPException(status_code=400, detail="Cần course_url hoặc title")
+
+    try:
+        index = (await run_in_threadpool(get_sharded_recommender)).similar_index
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi khi tìm khóa học tương tự: {str(e)}")
+
+    found = index.lookup(course_url=course_url, title=title, k=k)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy khóa học")
+    course, similar = found
+    return {"course": course, "similar": similar, "count": len(similar)}
+
+
+@app.post("/similar/refresh/")
+async def refresh_similar_courses(x_profile_token: Optional[str] = Header(None)):
+    """
+    Thêm khóa học mới trong catalogue vào similar-course index (incremental,
+    không tính lại neighbors của toàn bộ catalogue), chỉ dành cho admin
+    (header X-Profile-Token thuộc PROFILE_ADMIN_TOKENS)
+    """
+    if not profiling.is_admin(x_profile_token):
+        raise HTTPException(status_code=403, detail="Không có quyền refresh index")
+
+    try:
+        sharded = await run_in_threadpool(get_sharded_recommender)
+        added = await run_in_threadpool(sharded.refresh_similar_courses)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi khi refresh: {str(e)}")
+    return {"added": added, "total_courses": len(sharded.similar_index)}
+
+
 @app.get("/topics/")
-async def get_available_topics():
+async def get_available_topics(if_none_match: Optional[str] = Header(None)):
     """
     Lấy danh sách tất cả topics có trong knowledge graph
 
+    Catalogue được tính sẵn khi build recommender; trả về kèm ETag (theo data version)
+    và Cache-Control, hỗ trợ conditional GET (If-None-Match -> 304 Not Modified).
+
     Returns:
         - topics: List các topic có sẵn
         - count: Số lượng topics
+        - topic_counts: Số khóa học theo topic
+        - skills: Các skill đã mine (course_count, pattern_support)
     """
     try:
-        recommender = get_recommender()
-        topics = recommender.get_available_topics()
-        return {
-            "topics": topics,
-            "count": len(topics)
-        }
+        recommender = await run_in_threadpool(get_recommender)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi khi lấy topics: {str(e)}")
 
+    etag = recommender.topic_catalogue_etag
+    headers = {"ETag": etag, "Cache-Control": TOPICS_CACHE_CONTROL}
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=recommender.topic_catalogue_bytes, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """So khớp If-None-Match (weak comparison, hỗ trợ danh sách và "*")"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
 
 @app.get("/search/")
 async def search_courses(keyword: str, limit: int = 10):
@@ -242,8 +492,8 @@ async def search_courses(keyword: str, limit: int = 10):
         - keyword: Từ khóa đã tìm
     """
     try:
-        recommender = get_recommender()
-        courses = recommender.search_courses_by_keyword(keyword, limit)
+        recommender = await run_in_threadpool(get_recommender)
+        courses = await run_in_threadpool(recommender.search_courses_by_keyword, keyword, limit)
         return {
             "courses": courses,
             "count": len(courses),
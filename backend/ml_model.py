@@ -1,9 +1,10 @@
-import joblib
 import numpy as np
 import pandas as pd
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 import os
+import threading
+import time
 
 # ============== INPUT/OUTPUT SCHEMAS ==============
 
@@ -25,6 +26,18 @@ class PredictionOutput(BaseModel):
     prediction: str
     probability: float
 
+# ============== FEATURE CONSTANTS ==============
+
+# 8 raw features (đúng thứ tự của PredictionInput)
+RAW_FEATURE_NAMES = [
+    'rating', 'discount', 'num_reviews', 'num_students',
+    'price', 'total_length_minutes', 'sections', 'lectures'
+]
+
+# LabelEncoder mặc định sort theo alphabet: High=0, Low=1, Medium=2
+DISCOUNT_LABELS = sorted(['Low', 'Medium', 'High'])
+DISCOUNT_CODES = {name: idx for idx, name in enumerate(DISCOUNT_LABELS)}
+
 # ============== MODEL CLASS ==============
 
 class UdemyBestsellerModel:
@@ -33,29 +46,27 @@ class UdemyBestsellerModel:
     Nhận 12 features đã engineered từ frontend, scale và predict
     """
     
-    def __init__(self):
+    def __init__(self, model_path: str = 'model.pkl', scaler_path: str = 'scaler_final.pkl',
+                 fast_model_path: str = 'model_fast.pkl', mmap_mode: Optional[str] = 'r'):
         # Paths
-        model_path = 'model.pkl'
-        scaler_path = 'scaler_final.pkl'
-        
-        # Load model (Random Forest sau GridSearch)
-        if os.path.exists(model_path):
-            self.model = joblib.load(model_path)
-            print(f"✓ Đã load model từ {model_path}")
-            print(f"  Model type: {type(self.model).__name__}")
-            if hasattr(self.model, 'n_features_in_'):
-                print(f"  Number of features: {self.model.n_features_in_}")
-        else:
-            print(f"⚠ Warning: {model_path} không tồn tại.")
-            self.model = None
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        # Model distill + margins early-exit (sinh bởi distill_model.py)
+        self.fast_model_path = fast_model_path
+        # joblib mmap_mode: các numpy array lớn được map từ file thay vì copy vào RAM
+        self.mmap_mode = mmap_mode
         
-        # Load scaler (RobustScaler đã fit trên train set)
-        if os.path.exists(scaler_path):
-            self.scaler = joblib.load(scaler_path)
-            print(f"✓ Đã load scaler từ {scaler_path}")
-        else:
-            print(f"⚠ Warning: {scaler_path} không tồn tại.")
-            self.scaler = None
+        # Model/scaler được load lazy (lần đầu dùng hoặc qua warm-up nền),
+        # để import module không phải trả chi phí load pickle
+        self._model = None
+        self._scaler = None
+        self._fast_model = None
+        self._early_exit = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self.load_timings = {}
+        # Latency ước lượng (ms) theo tier, cập nhật EWMA sau mỗi request
+        self.tier_latency_ms = {}
         
         # Thứ tự features (12 features) - PHẢI ĐÚNG với lúc train
         self.FEATURE_NAMES = [
@@ -71,15 +82,147 @@ class UdemyBestsellerModel:
             1: 'Bestseller'
         }
     
-    def preprocess_input(self, input_data: PredictionInput) -> pd.DataFrame:
+    @property
+    def model(self):
+        self.load()
+        return self._model
+    
+    @property
+    def scaler(self):
+        self.load()
+        return self._scaler
+    
+    def load(self):
+        """Load model và scaler (chỉ một lần, thread-safe)"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            
+            t0 = time.perf_counter()
+            import joblib
+            self.load_timings['import joblib'] = time.perf_counter() - t0
+            
+            # Load model (GradientBoosting sau GridSearch)
+            if os.path.exists(self.model_path):
+                t0 = time.perf_counter()
+                self._model = joblib.load(self.model_path, mmap_mode=self.mmap_mode)
+                self.load_timings[self.model_path] = time.perf_counter() - t0
+                print(f"✓ Đã load model từ {self.model_path} ({self.load_timings[self.model_path]:.2f}s)")
+                print(f"  Model type: {type(self._model).__name__}")
+                if hasattr(self._model, 'n_features_in_'):
+                    print(f"  Number of features: {self._model.n_features_in_}")
+            else:
+                print(f"⚠ Warning: {self.model_path} không tồn tại.")
+                self._model = None
+            
+            # Load scaler (RobustScaler đã fit trên train set)
+            if os.path.exists(self.scaler_path):
+                t0 = time.perf_counter()
+                self._scaler = joblib.load(self.scaler_path, mmap_mode=self.mmap_mode)
+                self.load_timings[self.scaler_path] = time.perf_counter() - t0
+                print(f"✓ Đã load scaler từ {self.scaler_path}")
+            else:
+                print(f"⚠ Warning: {self.scaler_path} không tồn tại.")
+                self._scaler = None
+            
+            self._load_tiers(joblib)
+            self._loaded = True
+    
+    def _load_tiers(self, joblib):
+        """Dựng tier early_exit (từ model.pkl) và fast (từ model_fast.pkl nếu có)"""
+        from inference_tiers import EarlyExitGradientBoosting, PackedTreeEnsemble, supports_early_exit
+        
+        bundle = {}
+        if os.path.exists(self.fast_model_path):
+            bundle = joblib.load(self.fast_model_path)
+            self._fast_model = PackedTreeEnsemble(bundle['fast_model'])
+            self.tier_latency_ms.update(bundle.get('latency_ms', {}))
+            print(f"✓ Đã load fast model từ {self.fast_model_path}")
+        
+        if self._model is not None and supports_early_exit(self._model):
+            self._early_exit = EarlyExitGradientBoosting(
+                self._model,
+                margins=bundle.get('early_exit_margins'),
+                block=bundle.get('early_exit_block', 10)
+            )
+    
+    def warm_up_in_background(self) -> threading.Thread:
+        """Load model trong thread nền để server trả lời healthcheck ngay khi khởi động"""
+        thread = threading.Thread(target=self.load, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+    
+    def engineer_features(self, raw) -> np.ndarray:
         """
-        Tiền xử lý raw input thành 12 engineered features
+        Feature engineering vector hóa: 8 raw features -> 12 features (chưa scale)
         
         Các bước:
         1. Log transformation: num_reviews, num_students, price, total_length_minutes
         2. Sqrt transformation: sections, lectures
         3. Feature engineering: effective_price, popularity_score, price_per_hour
         4. Discount category encoding
+        
+        Args:
+            raw: DataFrame hoặc dict {field: array} với 8 raw features (n dòng)
+            
+        Returns:
+            ndarray (n, 12) theo đúng thứ tự FEATURE_NAMES
+        """
+        col = {name: np.asarray(raw[name], dtype=np.float64).reshape(-1) for name in RAW_FEATURE_NAMES}
+        discount_clipped = np.clip(col['discount'], 0, 1)
+        
+        # 4. DISCOUNT CATEGORY ENCODING
+        # Chia discount thành 3 bins: Low [0-0.3], Medium (0.3-0.6], High (0.6-1.0]
+        # LabelEncoder mặc định sort theo alphabet: High=0, Low=1, Medium=2
+        discount_category = np.where(
+            discount_clipped <= 0.3, DISCOUNT_CODES['Low'],
+            np.where(discount_clipped <= 0.6, DISCOUNT_CODES['Medium'], DISCOUNT_CODES['High'])
+        )
+        
+        return np.column_stack([
+            col['rating'],
+            col['discount'],
+            # 1. LOG TRANSFORMATIONS (dùng log1p để tránh log(0))
+            np.log1p(col['num_reviews']),
+            np.log1p(col['num_students']),
+            np.log1p(col['price']),
+            np.log1p(col['total_length_minutes']),
+            # 2. SQRT TRANSFORMATIONS
+            np.sqrt(np.clip(col['sections'], 0, None)),
+            np.sqrt(np.clip(col['lectures'], 0, None)),
+            # 3. FEATURE ENGINEERING
+            # Giá hiệu quả sau giảm giá
+            col['price'] * (1 - discount_clipped),
+            # Điểm độ phổ biến (trung bình students và reviews)
+            (col['num_students'] + col['num_reviews']) / 2,
+            # Giá mỗi giờ
+            col['price'] / (col['total_length_minutes'] / 60 + 1e-3),
+            discount_category,
+        ])
+    
+    def scale_features(self, X: np.ndarray) -> np.ndarray:
+        """RobustScaler.transform trên numpy thuần (không qua validate của sklearn)"""
+        scaler = self.scaler
+        if scaler is None:
+            return X
+        if getattr(scaler, 'center_', None) is not None:
+            X = X - scaler.center_
+        if getattr(scaler, 'scale_', None) is not None:
+            X = X / scaler.scale_
+        return X
+    
+    def preprocess_batch(self, raw) -> np.ndarray:
+        """Feature engineering + scaling cho nhiều dòng, không log (dùng cho batch/tier nhanh)"""
+        return self.scale_features(self.engineer_features(raw))
+    
+    def preprocess_input(self, input_data: PredictionInput) -> pd.DataFrame:
+        """
+        Tiền xử lý raw input thành 12 engineered features
+        
+        Các bước:
+        1-4. Feature engineering (xem engineer_features)
         5. Scaling với RobustScaler
         
         Args:
@@ -90,7 +233,6 @@ class UdemyBestsellerModel:
         """
         # Chuyển input thành dict
         data = input_data.dict()
-        df = pd.DataFrame([data])
         
         print("\n" + "="*80)
         print("📥 RAW INPUT (trước khi xử lý):")
@@ -104,43 +246,9 @@ class UdemyBestsellerModel:
         print(f"  sections: {data['sections']}")
         print(f"  lectures: {data['lectures']}")
         
-        # 1. LOG TRANSFORMATIONS (dùng log1p để tránh log(0))
-        df['log_num_reviews'] = np.log1p(df['num_reviews'])
-        df['log_num_students'] = np.log1p(df['num_students'])
-        df['log_price'] = np.log1p(df['price'])
-        df['log_total_length_minutes'] = np.log1p(df['total_length_minutes'])
-        
-        # 2. SQRT TRANSFORMATIONS
-        df['sqrt_sections'] = np.sqrt(np.clip(df['sections'], 0, None))
-        df['sqrt_lectures'] = np.sqrt(np.clip(df['lectures'], 0, None))
-        
-        # 3. FEATURE ENGINEERING
-        # Giá hiệu quả sau giảm giá
-        df['effective_price'] = df['price'] * (1 - np.clip(df['discount'], 0, 1))
-        
-        # Điểm độ phổ biến (trung bình students và reviews)
-        df['popularity_score'] = (df['num_students'] + df['num_reviews']) / 2
-        
-        # Giá mỗi giờ
-        df['price_per_hour'] = df['price'] / (df['total_length_minutes'] / 60 + 1e-3)
-        
-        # 4. DISCOUNT CATEGORY ENCODING
-        # Chia discount thành 3 bins: Low [0-0.3), Medium [0.3-0.6), High [0.6-1.0]
-        bins = [0, 0.3, 0.6, 1.0]
-        labels = ['Low', 'Medium', 'High']
-        
-        # pd.cut trả về category
-        discount_cat = pd.cut(
-            np.clip(df['discount'], 0, 1), 
-            bins=bins, 
-            labels=labels, 
-            include_lowest=True
-        )
-        
-        # LabelEncoder mặc định sort theo alphabet: High=0, Low=1, Medium=2
-        le_order = sorted(labels)  # ['High', 'Low', 'Medium']
-        discount_map = {name: idx for idx, name in enumerate(le_order)}
-        df['discount_category'] = discount_cat.astype(str).map(discount_map).astype(int)
+        df = pd.DataFrame(self.engineer_features(data), columns=self.FEATURE_NAMES)
+        discount_label = DISCOUNT_LABELS[int(df['discount_category'].values[0])]
+        df['discount_category'] = df['discount_category'].astype(int)
         
         print("\n" + "="*80)
         print("🔧 ENGINEERED FEATURES (sau feature engineering):")
@@ -156,7 +264,7 @@ class UdemyBestsellerModel:
         print(f"  effective_price: {df['effective_price'].values[0]:,.2f} VND")
         print(f"  popularity_score: {df['popularity_score'].values[0]:,.2f}")
         print(f"  price_per_hour: {df['price_per_hour'].values[0]:,.2f} VND/hour")
-        print(f"  discount_category: {df['discount_category'].values[0]} ({discount_cat.values[0]})")
+        print(f"  discount_category: {df['discount_category'].values[0]} ({discount_label})")
         
         # 5. CHỈ GIỮ 12 FEATURES CUỐI CÙNG (đúng thứ tự)
         df_model = df[self.FEATURE_NAMES].copy()
@@ -182,19 +290,114 @@ class UdemyBestsellerModel:
             print("⚠ Warning: Scaler không tồn tại, trả về data chưa scale")
             return df_model
     
-    def predict(self, input_data: PredictionInput) -> dict:
+    # ============== INFERENCE TIERS ==============
+    
+    def available_tiers(self) -> List[str]:
+        """Các tier dùng được với artifact hiện có (thứ tự chính xác -> nhanh)"""
+        self.load()
+        tiers = []
+        if self._model is not None:
+            tiers.append('full')
+        if self._early_exit is not None:
+            tiers.append('early_exit')
+        if self._fast_model is not None:
+            tiers.append('fast')
+        return tiers
+    
+    def select_tier(self, tier: Optional[str] = None, latency_budget_ms: Optional[float] = None) -> str:
+        """
+        Chọn tier cho một request:
+        - tier chỉ định tường minh (nếu khả dụng), ngược lại 'full'
+        - hoặc theo latency budget: tier chính xác nhất có latency ước lượng <= budget,
+          không tier nào vừa thì dùng tier nhanh nhất
+        """
+        available = self.available_tiers()
+        if not available:
+            return 'full'
+        if tier is not None and tier != 'auto':
+            return tier if tier in available else available[0]
+        if latency_budget_ms is None:
+            return available[0]
+        for candidate in available:
+            estimate = self.tier_latency_ms.get(candidate)
+            if estimate is not None and estimate <= latency_budget_ms:
+                return candidate
+        return available[-1]
+    
+    def predict_proba_batch(self, raw, tier: str = 'full') -> np.ndarray:
+        """
+        Xác suất Bestseller (class 1) cho nhiều dòng, không log từng dòng
+        
+        Args:
+            raw: DataFrame hoặc dict {field: array} với 8 raw features
+            tier: 'full' | 'early_exit' | 'fast'
+        """
+        X = self.preprocess_batch(raw)
+        if tier == 'early_exit' and self._early_exit is not None:
+            return self._early_exit.predict_proba(X)
+        if tier == 'fast' and self._fast_model is not None:
+            return self._fast_model.predict_proba(X)
+        if self.model is None:
+            return np.full(X.shape[0], 0.5)
+        return self.model.predict_proba(pd.DataFrame(X, columns=self.FEATURE_NAMES))[:, 1]
+    
+    def predict_sweep(self, base: dict, axes: Dict[str, np.ndarray], tier: str = 'full') -> np.ndarray:
+        """
+        Xác suất Bestseller trên lưới what-if: `base` + tích Descartes các `axes`,
+        chấm điểm trong một lần gọi predict_proba_batch
+        
+        Args:
+            base: 8 raw features của khóa học gốc
+            axes: {field: mảng giá trị}, thứ tự key là thứ tự chiều
+            tier: 'full' | 'early_exit' | 'fast'
+            
+        Returns:
+            ndarray shape (len(axis_1), ..., len(axis_d))
+        """
+        shape = tuple(len(values) for values in axes.values())
+        n = int(np.prod(shape))
+        raw = {name: np.full(n, float(base[name])) for name in RAW_FEATURE_NAMES}
+        for name, grid in zip(axes, np.meshgrid(*axes.values(), indexing='ij')):
+            raw[name] = grid.ravel()
+        return self.predict_proba_batch(raw, tier).reshape(shape)
+    
+    def _record_latency(self, tier: str, elapsed_ms: float, alpha: float = 0.2):
+        """EWMA latency theo tier, dùng cho select_tier"""
+        previous = self.tier_latency_ms.get(tier)
+        self.tier_latency_ms[tier] = elapsed_ms if previous is None else (1 - alpha) * previous + alpha * elapsed_ms
+    
+    def predict(self, input_data: PredictionInput, tier: Optional[str] = None,
+                latency_budget_ms: Optional[float] = None) -> dict:
         """
         Dự đoán bestseller từ raw input
         
         Args:
             input_data: PredictionInput với 8 raw features
+            tier: 'full' | 'early_exit' | 'fast' | 'auto' (None = full)
+            latency_budget_ms: Budget độ trễ, dùng khi tier là None/'auto'
             
         Returns:
             {
                 "prediction": "Bestseller" hoặc "Not Bestseller",
-                "probability": float (0-1)
+                "probability": float (0-1),
+                "tier": tier đã trả lời
             }
         """
+        tier = self.select_tier(tier, latency_budget_ms)
+        t0 = time.perf_counter()
+        
+        if tier != 'full':
+            # Tier nhanh: numpy thuần, không log chi tiết
+            p_bestseller = float(self.predict_proba_batch(input_data.dict(), tier)[0])
+            prediction_class = int(p_bestseller > 0.5)
+            probability = p_bestseller if prediction_class == 1 else 1.0 - p_bestseller
+            self._record_latency(tier, (time.perf_counter() - t0) * 1000)
+            return {
+                "prediction": self.target_mapping[prediction_class],
+                "probability": probability,
+                "tier": tier
+            }
+        
         # Preprocess (feature engineering + scaling)
         X_processed = self.preprocess_input(input_data)
         
@@ -211,23 +414,26 @@ class UdemyBestsellerModel:
                 probability = 1.0
             
             print(f"✓ Prediction: {prediction_label} (prob: {probability:.4f})")
+            self._record_latency(tier, (time.perf_counter() - t0) * 1000)
             
             return {
                 "prediction": prediction_label,
-                "probability": probability
+                "probability": probability,
+                "tier": tier
             }
         else:
             # Dummy prediction nếu chưa có model
             print("⚠ Warning: Model không tồn tại, trả về dummy prediction")
             return {
                 "prediction": "Not Bestseller",
-                "probability": 0.5
+                "probability": 0.5,
+                "tier": tier
             }
 
 
 # ============== KHỞI TẠO MODEL (Singleton) ==============
 
-# Khởi tạo model một lần khi module được import
+# Khởi tạo model một lần khi module được import (artifact được load lazy)
 model = UdemyBestsellerModel()
 
 # Export để dùng trong FastAPI
@@ -0,0 +1,254 @@
+"""
+Profiling Module - Sampling profiler cho từng request
+Bật theo request (header/query + admin token) hoặc tự động lấy mẫu một phần traffic.
+
+Lưu ý: sampler đọc stack của mọi thread (frame gốc = tên thread), gồm thread event
+loop và worker threadpool chạy endpoint sync / run_in_threadpool. Các thread này
+dùng chung cho mọi request, nên profile chứa cả frame của request khác chạy xen kẽ
+(số request chồng lấn ghi ở frame gốc của event loop và header X-Profile-Overlap).
+Thread đang rảnh (chờ lock/queue) không được ghi.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+
+# ============== CONFIG (qua biến môi trường) ==============
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+# Danh sách token admin được phép bật profiler (phân tách bằng dấu phẩy)
+PROFILE_ADMIN_TOKENS = {
+    token.strip() for token in os.getenv("PROFILE_ADMIN_TOKENS", "").split(",") if token.strip()
+}
+# Tỉ lệ request được profile tự động (0.0 = tắt, 0.01 = 1%)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Khoảng thời gian giữa hai lần lấy mẫu stack (giây)
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+# "collapsed" (flamegraph.pl / speedscope import) hoặc "speedscope"
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "collapsed")
+# Giới hạn dung lượng thư mục profile, file cũ nhất bị xóa trước
+PROFILE_MAX_BYTES = int(os.getenv("PROFILE_MAX_BYTES", str(50 * 1024 * 1024)))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "500"))
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_OVERLAP_HEADER = "X-Profile-Overlap"
+PROFILE_QUERY_PARAM = "profile"
+
+_EXTENSIONS = {"collapsed": ".collapsed.txt", "speedscope": ".speedscope.json"}
+_disk_lock = threading.Lock()
+
+
+class StackSampler:
+    """
+    Sampling profiler nhẹ: một thread phụ định kỳ đọc stack của mọi thread qua
+    sys._current_frames() và đếm các stack giống nhau theo từng thread.
+    `thread_id` là thread event loop đang xử lý request: mẫu của nó luôn được ghi,
+    kể cả khi rảnh, và sampler dừng khi thread này kết thúc.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        # (thread id, tên thread, stack) -> số mẫu
+        self.samples: Counter = Counter()
+        # Số request khác chạy chồng lên khoảng đo trên cùng thread event loop
+        self.overlapping = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id not in frames:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                name = names.get(thread_id, str(thread_id))
+                if name == "stack-sampler":
+                    continue
+                if thread_id != self.thread_id and _is_idle(frame):
+                    continue
+                self.samples[(thread_id, name, self._collapse(frame))] += 1
+
+    @staticmethod
+    def _collapse(frame) -> Tuple[str, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def thread_tag(self, thread_id: int, name: str) -> str:
+        """Frame gốc của stack: tên thread (+ số request chồng lấn với event loop)"""
+        if thread_id == self.thread_id:
+            return f"{name} (event loop, shared, {self.overlapping} overlapping requests)"
+        return name
+
+    def to_collapsed(self) -> str:
+        """Định dạng collapsed-stack: 'thread;frame;frame;frame count' mỗi dòng"""
+        return "".join(
+            f"{';'.join((self.thread_tag(thread_id, name),) + stack)} {count}\n"
+            for (thread_id, name, stack), count in self.samples.most_common()
+        )
+
+    def to_speedscope(self, name: str) -> str:
+        """Định dạng speedscope 'sampled' profile (mở trực tiếp tại speedscope.app)"""
+        frame_index: Dict[str, int] = {}
+        samples, weights = [], []
+        for (thread_id, thread_name, stack), count in self.samples.items():
+            root = self.thread_tag(thread_id, thread_name)
+            samples.append([frame_index.setdefault(f, len(frame_index)) for f in (root,) + stack])
+            weights.append(count * self.interval)
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": f} for f in frame_index]},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.duration,
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "udemy-backend-profiling",
+        })
+
+
+def _is_idle(frame) -> bool:
+    """Thread đang chờ việc (worker threadpool chờ queue, thread chờ lock/select)"""
+    return Path(frame.f_code.co_filename).name in ("threading.py", "queue.py", "selectors.py")
+
+
+def should_profile(headers, query_params) -> bool:
+    """
+    Quyết định có profile request này không:
+    - Yêu cầu tường minh (header X-Profile hoặc ?profile=1) + token nằm trong allow-list
+    - Hoặc được chọn ngẫu nhiên theo PROFILE_SAMPLE_RATE
+    """
+    requested = headers.get(PROFILE_HEADER) == "1" or query_params.get(PROFILE_QUERY_PARAM) == "1"
+    if requested and headers.get(PROFILE_TOKEN_HEADER) in PROFILE_ADMIN_TOKENS:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return token is not None and token in PROFILE_ADMIN_TOKENS
+
+
+def save_profile(sampler: StackSampler, label: str) -> str:
+    """Ghi profile ra PROFILE_DIR và trả về profile id"""
+    profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    fmt = PROFILE_FORMAT if PROFILE_FORMAT in _EXTENSIONS else "collapsed"
+    content = sampler.to_speedscope(label) if fmt == "speedscope" else sampler.to_collapsed()
+
+    with _disk_lock:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        (PROFILE_DIR / f"{profile_id}{_EXTENSIONS[fmt]}").write_text(content, encoding="utf-8")
+        _enforce_disk_budget()
+    return profile_id
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profile request được chọn bởi should_profile.
+
+    Request không được chọn đi thẳng vào app (không bọc Request/Response như
+    BaseHTTPMiddleware). Profile dừng khi response bắt đầu gửi, được ghi ra đĩa
+    trong threadpool rồi trả id qua header X-Profile-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+        self._active = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        for active in self._active:
+            active.overlapping += 1
+        self.in_flight += 1
+        try:
+            if not should_profile(Headers(scope=scope), QueryParams(scope["query_string"])):
+                await self.app(scope, receive, send)
+                return
+            await self._profile(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def _profile(self, scope, receive, send):
+        sampler = StackSampler(threading.get_ident())
+        sampler.overlapping = self.in_flight - 1
+        self._active.add(sampler)
+        sampler.start()
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start" and sampler in self._active:
+                self._active.discard(sampler)
+                sampler.stop()
+                profile_id = await run_in_threadpool(save_profile, sampler, f"{scope['method']} {scope['path']}")
+                headers = MutableHeaders(raw=message["headers"])
+                headers[PROFILE_ID_HEADER] = profile_id
+                headers[PROFILE_OVERLAP_HEADER] = str(sampler.overlapping)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            if sampler in self._active:  # lỗi trước khi response bắt đầu
+                self._active.discard(sampler)
+                sampler.stop()
+
+
+def find_profile(profile_id: str) -> Optional[Path]:
+    """Tìm file profile theo id (chỉ trong PROFILE_DIR)"""
+    if not profile_id or "/" in profile_id or "\\" in profile_id or ".." in profile_id:
+        return None
+    for ext in _EXTENSIONS.values():
+        path = PROFILE_DIR / f"{profile_id}{ext}"
+        if path.exists():
+            return path
+    return None
+
+
+def _enforce_disk_budget():
+    """Xóa các file cũ nhất cho tới khi nằm trong PROFILE_MAX_BYTES và PROFILE_MAX_FILES"""
+    files = sorted(
+        (p for p in PROFILE_DIR.iterdir() if p.is_file()),
+        key=lambda p: p.stat().st_mtime,
+    )
+    total = sum(p.stat().st_size for p in files)
+    while files and (total > PROFILE_MAX_BYTES or len(files) > PROFILE_MAX_FILES):
+        oldest = files.pop(0)
+        total -= oldest.stat().st_size
+        oldest.unlink(missing_ok=True)
@@ -0,0 +1,187 @@
+"""
+Responses - Serialize nhanh và nén response lớn
+
+- FastJSONResponse: render bằng orjson (datetime, numpy native); fallback
+  jsonable_encoder + json khi chưa cài orjson
+- fast_response: trả thẳng Response, bỏ qua jsonable_encoder và validate
+  response_model của FastAPI; chỉ validate khi API_DEBUG=1
+- CompressionMiddleware: nén br (nếu cài brotli) hoặc gzip theo Accept-Encoding,
+  chỉ với response từ COMPRESSION_MIN_BYTES trở lên
+"""
+
+import os
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ============== CONFIG (qua biến môi trường) ==============
+
+# Validate nội dung trả về theo response model (chậm, chỉ dùng khi dev/debug)
+API_DEBUG = os.getenv("API_DEBUG", "0") == "1"
+# Response nhỏ hơn ngưỡng này không được nén (header + CPU không đáng)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Quality 4-5: tỉ lệ nén tốt hơn gzip-6 mà vẫn nhanh (11 chỉ hợp với asset tĩnh)
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse render bằng orjson (nhanh hơn nhiều so với json + jsonable_encoder)"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def fast_response(content: Any, model=None, status_code: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """
+    Response JSON cho endpoint trả payload lớn. Endpoint vẫn khai báo response_model
+    (cho OpenAPI), nhưng trả Response trực tiếp nên FastAPI không validate/encode lại.
+
+    Args:
+        content: dict/list gồm kiểu orjson hỗ trợ (str, số, bool, None, datetime, numpy)
+        model: Kiểu của response_model (vd. List[UdemyPredictionResponse]); chỉ dùng khi API_DEBUG=1
+    """
+    if API_DEBUG and model is not None:
+        _adapter(model).validate_python(content)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+# ============== COMPRESSION ==============
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """'br' | 'gzip' | None theo Accept-Encoding (q=0 nghĩa là từ chối)"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    def allowed(encoding: str) -> bool:
+        return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Giao diện chung cho gzip (zlib) và brotli: compress() từng chunk, finish() ở cuối"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self.compress = self._compressor.process
+            self.finish = self._compressor.finish
+        else:
+            # wbits=31: định dạng gzip (header + CRC) thay vì zlib thô
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self.compress = self._compressor.compress
+            self.finish = self._compressor.flush
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware nén response theo Accept-Encoding (ưu tiên br, rồi gzip).
+
+    - Response một lần (JSON): chỉ nén khi body >= minimum_size
+    - Streaming response (CSV export): nén từng chunk
+    - Bỏ qua response đã có Content-Encoding
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES,
+                 gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                if Headers(raw=message["headers"]).get("content-encoding"):
+                    passthrough = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                    await send(start_message)
+                else:
+                    compressed = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
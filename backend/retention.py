@@ -0,0 +1,474 @@
+"""
+Retention - Archive prediction cũ ra khỏi bảng udemy_predictions
+Dòng cũ hơn RETENTION_DAYS được ghi ra Parquet (nén zstd, phân vùng theo ngày:
+archive/created_date=YYYY-MM-DD/part-<min_id>-<max_id>-<digest>.parquet), xóa khỏi bảng
+theo batch, rồi giải phóng trang trống bằng incremental vacuum. Bảng "nóng" luôn
+nhỏ; dữ liệu lịch sử đọc lại qua read_archive / iter_export_frames.
+
+Mỗi batch là các dòng cũ có id nhỏ nhất, nên nếu bị ngắt giữa lúc ghi file và
+xóa dòng, lần chạy sau tạo lại đúng file đó (ghi đè) chứ không sinh bản trùng.
+id không duy nhất trong archive: SQLite dùng lại id sau khi các dòng id lớn nhất
+bị xóa (retention, DELETE /predictions/). Tên file vì vậy kèm digest của
+(id, created_at), và compact chỉ bỏ dòng trùng toàn bộ cột.
+Cuối mỗi lần archive, các partition vừa ghi được compact lại thành một file/ngày
+(không tích lũy file nhỏ qua các batch và các lần chạy).
+
+Archive/compact giữ khóa liên process (flock trên ARCHIVE_DIR/.retention.lock):
+mỗi worker uvicorn có thread retention riêng, nhưng tại một thời điểm chỉ một
+process chạy, các process khác bỏ qua lượt đó. Có thể tắt thread trong app
+(không đặt RETENTION_DAYS) và chạy `python retention.py archive` bằng cron.
+
+Usage:
+    python retention.py archive --days 90
+    python retention.py compact                 # gộp file nhỏ của archive cũ
+    python retention.py export history.csv --since 2025-01-01 --until 2025-06-30
+    python retention.py stats
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+try:
+    import fcntl
+except ImportError:  # Windows: không có flock, chỉ nên chạy một process
+    fcntl = None
+
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", "archive"))
+# Số ngày giữ trong bảng nóng; không đặt = không chạy retention định kỳ trong app
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "0")) or None
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "5000"))
+RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "24"))
+# Số trang giải phóng mỗi bước incremental vacuum (giữ lock ghi ngắn)
+RETENTION_VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", "1000"))
+
+TABLE = "udemy_predictions"
+PARTITION_COLUMN = "created_date"
+# Định dạng DateTime của SQLAlchemy trên SQLite (so sánh chuỗi = so sánh thời gian)
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# Tiền tố "." -> dataset Parquet bỏ qua
+LOCK_FILE = ".retention.lock"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Archive Parquet cần pyarrow: pip install pyarrow")
+
+
+def _sqlite_time(value: datetime) -> str:
+    return value.strftime(SQLITE_DATETIME_FORMAT)
+
+
+def _frame(result, rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=list(result.keys()))
+    df['created_at'] = pd.to_datetime(df['created_at'], format='ISO8601')
+    return df
+
+
+# ============== ARCHIVE (ghi) ==============
+
+def _part_path(directory: Path, df: pd.DataFrame) -> Path:
+    """
+    part-<min_id>-<max_id>-<digest>.parquet: cùng batch -> cùng tên (chạy lại thì ghi đè),
+    batch khác dùng lại dải id -> digest khác, không ghi đè
+    """
+    keys = df[['id', 'created_at']].astype({'id': 'int64', 'created_at': 'datetime64[us]'})
+    digest = hashlib.blake2b(pd.util.hash_pandas_object(keys, index=False).to_numpy().tobytes(),
+                             digest_size=4).hexdigest()
+    return directory / f"part-{int(df['id'].min()):012d}-{int(df['id'].max()):012d}-{digest}.parquet"
+
+
+def _write_parquet(df: pd.DataFrame, path: Path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tmp_path = path.parent / f".{path.name}.tmp"  # tiền tố "." -> dataset bỏ qua
+    table = pa.Table.from_pandas(df.sort_values('id'), preserve_index=False)
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)  # file chỉ xuất hiện khi đã ghi xong
+
+
+def write_partitions(df: pd.DataFrame, archive_dir: Path = ARCHIVE_DIR) -> List[Path]:
+    """Ghi một batch ra các file Parquet theo ngày created_at; trả về các file đã ghi"""
+    paths = []
+    for day, part in df.groupby(df['created_at'].dt.strftime('%Y-%m-%d'), sort=True):
+        directory = Path(archive_dir) / f"{PARTITION_COLUMN}={day}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = _part_path(directory, part)
+        _write_parquet(part, path)
+        paths.append(path)
+    return paths
+
+
+def compact_partition(directory: Path) -> int:
+    """
+    Gộp các file của một partition ngày thành một file; trả về số file đã bỏ đi.
+
+    File gộp được ghi xong rồi mới xóa file cũ: nếu bị ngắt ở giữa, lần compact sau
+    gộp lại và bỏ dòng trùng. Chỉ dòng giống nhau ở mọi cột mới là bản trùng (id có
+    thể được SQLite dùng lại cho dòng khác). Reader đọc đúng lúc đó có thể thấy dòng trùng.
+    """
+    import pyarrow.parquet as pq
+
+    parts = sorted(Path(directory).glob("part-*.parquet"))
+    if len(parts) < 2:
+        return 0
+    df = pd.concat([pq.read_table(path).to_pandas() for path in parts], ignore_index=True)
+    df = df.drop_duplicates()
+    path = _part_path(Path(directory), df)
+    _write_parquet(df, path)
+    for part in parts:
+        if part != path:
+            part.unlink()
+    return len(parts) - 1
+
+
+def compact_partitions(archive_dir: Path = ARCHIVE_DIR,
+                       directories: Optional[Iterable[Path]] = None) -> int:
+    """Compact các partition cho trước (mặc định: toàn bộ archive); trả về số file đã bỏ đi"""
+    if directories is None:
+        directories = Path(archive_dir).glob(f"{PARTITION_COLUMN}=*")
+    return sum(compact_partition(directory) for directory in sorted(set(directories)))
+
+
+def incremental_vacuum_enabled(engine) -> bool:
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+
+
+def enable_incremental_vacuum(engine) -> bool:
+    """
+    Chuyển database sang auto_vacuum=INCREMENTAL (một lần, cần VACUUM đầy đủ, chỉ
+    chạy từ CLI). Trả về True nếu vừa chuyển.
+    """
+    if incremental_vacuum_enabled(engine):
+        return False
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+        return True
+
+
+def incremental_vacuum(engine, pages: int = RETENTION_VACUUM_PAGES) -> int:
+    """Giải phóng trang trống theo từng bước nhỏ; trả về số trang đã trả lại cho OS"""
+    freed = 0
+    with engine.connect() as conn:
+        while True:
+            free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if not free_pages:
+                break
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(pages)})")
+            remaining = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if remaining >= free_pages:
+                break  # auto_vacuum chưa bật: không giải phóng được
+            freed += free_pages - remaining
+        conn.commit()
+    return freed
+
+
+@contextmanager
+def archive_lock(archive_dir: Path = ARCHIVE_DIR) -> Iterator[bool]:
+    """
+    Khóa độc quyền (không chờ) cho archive/compact trên `archive_dir`, giữa các process
+    và các thread. Yield False nếu nơi khác đang giữ khóa.
+    """
+    Path(archive_dir).mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield True
+        return
+    with open(Path(archive_dir) / LOCK_FILE, "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def archive_old_predictions(engine, older_than_days: int, archive_dir: Path = ARCHIVE_DIR,
+                            batch_size: int = RETENTION_BATCH_SIZE,
+                            now: Optional[datetime] = None,
+                            convert_database: bool = True) -> Dict[str, float]:
+    """
+    Chuyển các dòng có created_at cũ hơn `older_than_days` sang archive.
+
+    Mỗi batch (tối đa `batch_size` dòng, id tăng dần) được ghi ra Parquet trước,
+    sau đó mới xóa khỏi bảng trong một transaction ngắn. Bỏ qua (skipped=True)
+    nếu process khác đang archive cùng `archive_dir`.
+
+    Args:
+        convert_database: Chuyển database cũ sang auto_vacuum=INCREMENTAL (VACUUM đầy
+            đủ, khóa ghi cả database); thread trong app đặt False
+    """
+    _require_pyarrow()
+    with archive_lock(archive_dir) as acquired:
+        if not acquired:
+            print(f"Retention đang chạy ở process khác ({archive_dir}), bỏ qua lượt này")
+            return {"archived_rows": 0, "files": 0, "batches": 0, "skipped": True}
+        return _archive_old_predictions(engine, older_than_days, archive_dir, batch_size, now,
+                                        convert_database)
+
+
+def _archive_old_predictions(engine, older_than_days: int, archive_dir: Path, batch_size: int,
+                             now: Optional[datetime], convert_database: bool) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    cutoff = _sqlite_time((now or datetime.utcnow()) - timedelta(days=older_than_days))
+    stats = {"archived_rows": 0, "files": 0, "batches": 0}
+    touched = set()
+
+    if convert_database:
+        enable_incremental_vacuum(engine)
+    while True:
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(f"SELECT * FROM {TABLE} WHERE created_at < :cutoff ORDER BY id LIMIT :limit"),
+                {"cutoff": cutoff, "limit": batch_size},
+            )
+            batch = _frame(result, result.fetchall())
+        if batch.empty:
+            break
+
+        paths = write_partitions(batch, archive_dir)
+        stats["files"] += len(paths)
+        touched.update(path.parent for path in paths)
+        # Batch là dải id liên tục của các dòng cũ -> xóa bằng range, không cần IN (...)
+        with engine.begin() as conn:
+            conn.execute(
+                text(f"DELETE FROM {TABLE} WHERE id BETWEEN :low AND :high AND created_at < :cutoff"),
+                {"low": int(batch['id'].min()), "high": int(batch['id'].max()), "cutoff": cutoff},
+            )
+        stats["archived_rows"] += len(batch)
+        stats["batches"] += 1
+        if len(batch) < batch_size:
+            break
+
+    # Mỗi batch ghi một file/ngày: gộp lại để partition không tích lũy file nhỏ
+    stats["compacted_files"] = compact_partitions(archive_dir, touched)
+    stats["vacuumed_pages"] = incremental_vacuum(engine) if stats["archived_rows"] else 0
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    print(f"Archived {stats['archived_rows']} predictions older than {older_than_days} days "
+          f"({stats['files']} files, {stats['compacted_files']} compacted away, "
+          f"{stats['vacuumed_pages']} pages vacuumed) in {stats['seconds']:.2f}s")
+    return stats
+
+
+# ============== ARCHIVE (đọc) ==============
+
+def _date_string(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat()[:10] if isinstance(value, (date, datetime)) else str(value)[:10]
+
+
+def read_archive(archive_dir: Path = ARCHIVE_DIR, since=None, until=None, columns=None) -> pd.DataFrame:
+    """
+    Đọc prediction đã archive trong khoảng ngày [since, until] (bao gồm 2 đầu).
+    Chỉ mở các partition thuộc khoảng ngày (partition pruning).
+    """
+    return pd.concat(
+        list(iter_archive_frames(archive_dir, since, until, columns)) or [pd.DataFrame(columns=columns)],
+        ignore_index=True,
+    )
+
+
+def iter_archive_frames(archive_dir: Path = ARCHIVE_DIR, since=None, until=None,
+                        columns=None) -> Iterator[pd.DataFrame]:
+    """Như read_archive nhưng trả về từng record batch (bộ nhớ bị chặn)"""
+    if not Path(archive_dir).exists():
+        return
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive")
+    dataset = ds.dataset(str(archive_dir), format="parquet", partitioning=partitioning)
+    condition = None
+    if since is not None:
+        condition = ds.field(PARTITION_COLUMN) >= _date_string(since)
+    if until is not None:
+        upper = ds.field(PARTITION_COLUMN) <= _date_string(until)
+        condition = upper if condition is None else condition & upper
+    # Cột partition chỉ dùng để lọc, không trả về (giữ cùng cột với bảng nóng)
+    columns = [c for c in (columns or dataset.schema.names) if c != PARTITION_COLUMN]
+    for batch in dataset.to_batches(columns=columns, filter=condition):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def iter_export_frames(engine, since=None, until=None, archive_dir: Path = ARCHIVE_DIR,
+                       chunksize: int = RETENTION_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Toàn bộ prediction trong khoảng ngày: phần đã archive trước, rồi bảng nóng
+    (cùng cột với bảng udemy_predictions)
+    """
+    yield from iter_archive_frames(archive_dir, since, until)
+
+    conditions, params = [], {}
+    if since is not None:
+        conditions.append("created_at >= :since")
+        params["since"] = _date_string(since)
+    if until is not None:
+        conditions.append("created_at < :until")
+        params["until"] = (date.fromisoformat(_date_string(until)) + timedelta(days=1)).isoformat()
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with engine.connect() as conn:
+        result = conn.execute(text(f"SELECT * FROM {TABLE} {where} ORDER BY id"), params)
+        while True:
+            rows = result.fetchmany(chunksize)
+            if not rows:
+                break
+            yield _frame(result, rows)
+
+
+def _archive_files(archive_dir: Path) -> List[Path]:
+    return sorted(Path(archive_dir).glob(f"{PARTITION_COLUMN}=*/*.parquet"))
+
+
+# archive_dir -> {(file, size, mtime): số dòng trong footer}
+_archived_rows: Dict[str, Dict[tuple, int]] = {}
+
+
+def archived_row_count(archive_dir: Path = ARCHIVE_DIR) -> int:
+    """
+    Số dòng đã archive, đếm từ footer Parquet. Mỗi lần gọi liệt kê lại file nên
+    archive/compact từ process khác (CLI, worker khác) được thấy ngay; footer chỉ
+    đọc với file mới hoặc đã đổi (cache theo tên, size, mtime).
+    """
+    key = str(Path(archive_dir).resolve())
+    while True:
+        try:
+            known = _archived_rows.get(key, {})
+            counts = {}
+            for path in _archive_files(archive_dir):
+                stat = path.stat()
+                file_key = (str(path), stat.st_size, stat.st_mtime_ns)
+                if file_key not in known:
+                    _require_pyarrow()
+                    import pyarrow.parquet as pq
+                    known[file_key] = pq.ParquetFile(path).metadata.num_rows
+                counts[file_key] = known[file_key]
+            _archived_rows[key] = counts  # bỏ file đã bị xóa/gộp
+            return sum(counts.values())
+        except FileNotFoundError:
+            continue  # compact vừa xóa file giữa lúc liệt kê: liệt kê lại
+
+
+def archive_stats(archive_dir: Path = ARCHIVE_DIR) -> Dict[str, float]:
+    """Số dòng / file / dung lượng / khoảng ngày của archive (chỉ đọc footer Parquet)"""
+    files = _archive_files(archive_dir)
+    if not files:
+        return {"rows": 0, "files": 0, "bytes": 0, "first_date": None, "last_date": None}
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+    return {
+        "rows": sum(pq.ParquetFile(path).metadata.num_rows for path in files),
+        "files": len(files),
+        "bytes": sum(path.stat().st_size for path in files),
+        "first_date": files[0].parent.name.split("=", 1)[1],
+        "last_date": files[-1].parent.name.split("=", 1)[1],
+    }
+
+
+# ============== CHẠY ĐỊNH KỲ TRONG APP ==============
+
+def start_retention_thread(engine, older_than_days: int = RETENTION_DAYS,
+                           interval_hours: float = RETENTION_INTERVAL_HOURS) -> threading.Thread:
+    """
+    Chạy archive_old_predictions định kỳ trong thread nền (daemon). Không chuyển
+    auto_vacuum (VACUUM đầy đủ chặn ghi): database cũ cần chạy CLI archive một lần.
+    """
+    def run():
+        if not incremental_vacuum_enabled(engine):
+            print("⚠️  auto_vacuum chưa bật: chạy `python retention.py archive` một lần "
+                  "để chuyển database, trước đó retention không trả lại dung lượng")
+        while True:
+            try:
+                archive_old_predictions(engine, older_than_days, convert_database=False)
+            except Exception as e:
+                print(f"⚠️  Retention lỗi: {e}")
+            time.sleep(interval_hours * 3600)
+
+    thread = threading.Thread(target=run, name="retention", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Retention / archive cho bảng udemy_predictions")
+    parser.add_argument("--archive-dir", default=str(ARCHIVE_DIR))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive = commands.add_parser("archive", help="Chuyển prediction cũ sang archive Parquet")
+    archive.add_argument("--days", type=int, default=RETENTION_DAYS or 90, help="Giữ N ngày gần nhất trong bảng")
+    archive.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE)
+
+    commands.add_parser("compact", help="Gộp các file nhỏ trong mỗi partition ngày của archive")
+
+    export = commands.add_parser("export", help="Xuất prediction (archive + bảng) ra CSV/Parquet")
+    export.add_argument("output")
+    export.add_argument("--since", default=None, help="YYYY-MM-DD")
+    export.add_argument("--until", default=None, help="YYYY-MM-DD (bao gồm)")
+
+    commands.add_parser("stats", help="Thống kê bảng nóng và archive")
+    args = parser.parse_args()
+    archive_dir = Path(args.archive_dir)
+
+    if args.command == "archive":
+        archive_old_predictions(engine, args.days, archive_dir, batch_size=args.batch_size)
+    elif args.command == "compact":
+        _require_pyarrow()
+        with archive_lock(archive_dir) as acquired:
+            if not acquired:
+                parser.exit(1, "Retention đang chạy ở process khác, thử lại sau\n")
+            before = archive_stats(archive_dir)["files"]
+            removed = compact_partitions(archive_dir)
+        print(f"Compacted archive: {before} -> {before - removed} files")
+    elif args.command == "export":
+        frames = iter_export_frames(engine, args.since, args.until, archive_dir)
+        rows = 0
+        if args.output.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            writer = None
+            for frame in frames:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                writer = writer or pq.ParquetWriter(args.output, table.schema, compression="zstd")
+                writer.write_table(table.cast(writer.schema))
+                rows += len(frame)
+            if writer is not None:
+                writer.close()
+        else:
+            for frame in frames:
+                frame.to_csv(args.output, mode="a" if rows else "w", header=not rows, index=False)
+                rows += len(frame)
+        print(f"Exported {rows} predictions -> {args.output}")
+    else:
+        with engine.connect() as conn:
+            hot_rows = conn.execute(text(f"SELECT COUNT(*) FROM {TABLE}")).scalar()
+            page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+            page_count = conn.exec_driver_sql("PRAGMA page_count").scalar()
+            free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        print(f"Hot table : {hot_rows} rows, {page_count * page_size / 1024:.0f} KiB "
+              f"({free_pages} free pages)")
+        print(f"Archive   : {archive_stats(archive_dir)}")
+
+
+if __name__ == "__main__":
+    main()
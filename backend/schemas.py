@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Literal, Optional
+import numpy as np
 
 # ============== RAW INPUT SCHEMA (8 features) ==============
 
@@ -63,6 +64,112 @@ class UdemyPredictionResponse(UdemyPredictionBase):
     prediction: str  # "Bestseller" hoặc "Not Bestseller"
     probability: float  # Xác suất dự đoán (0.0 - 1.0)
     created_at: datetime
+    tier: Optional[str] = None  # Inference tier đã trả lời: "full", "early_exit", "fast"
 
     class Config:
         from_attributes = True  # Thay thế orm_mode trong Pydantic v2
+
+
+# ============== WHAT-IF SWEEP SCHEMAS ==============
+
+SweepField = Literal[
+    'rating', 'discount', 'num_reviews', 'num_students',
+    'price', 'total_length_minutes', 'sections', 'lectures'
+]
+
+# Giới hạn kích thước lưới scenario của một request
+SWEEP_MAX_AXIS_POINTS = 200
+SWEEP_MAX_SCENARIOS = 100_000
+
+
+class SweepAxis(BaseModel):
+    """
+    Giá trị của một field trong sweep: danh sách `values`, hoặc range đều
+    `start` -> `stop` (bao gồm 2 đầu) với `num` điểm
+    """
+    values: Optional[List[float]] = Field(None, min_length=1, max_length=SWEEP_MAX_AXIS_POINTS)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    num: int = Field(10, ge=1, le=SWEEP_MAX_AXIS_POINTS)
+
+    @model_validator(mode='after')
+    def check_range(self):
+        if self.values is None and (self.start is None or self.stop is None):
+            raise ValueError("Cần `values` hoặc cả `start` và `stop`")
+        return self
+
+    def to_array(self) -> np.ndarray:
+        if self.values is not None:
+            return np.asarray(self.values, dtype=np.float64)
+        return np.linspace(self.start, self.stop, self.num)
+
+
+class PredictionSweepRequest(BaseModel):
+    """
+    What-if sweep: một khóa học gốc + lưới giá trị cho 1-3 field.
+    Thứ tự các field trong `axes` là thứ tự chiều của lưới xác suất trả về.
+    """
+    base: UdemyPredictionBase
+    axes: Dict[SweepField, SweepAxis] = Field(min_length=1, max_length=3)
+
+    @model_validator(mode='after')
+    def check_grid(self):
+        scenarios = 1
+        for name, axis in self.axes.items():
+            values = _axis_array(name, axis)
+            low, high, low_inclusive = _field_bounds(name)
+            if (values < low).any() or (not low_inclusive and (values <= low).any()) or (values > high).any():
+                raise ValueError(f"Giá trị của {name} nằm ngoài miền hợp lệ")
+            scenarios *= len(values)
+        if scenarios > SWEEP_MAX_SCENARIOS:
+            raise ValueError(f"Lưới có {scenarios} scenario, tối đa {SWEEP_MAX_SCENARIOS}")
+        return self
+
+    def axis_values(self) -> Dict[str, np.ndarray]:
+        """Giá trị từng trục (field kiểu int: số nguyên, range được làm tròn)"""
+        return {name: _axis_array(name, axis) for name, axis in self.axes.items()}
+
+
+def _axis_array(name: str, axis: SweepAxis) -> np.ndarray:
+    """
+    Giá trị của trục `name`. Field kiểu int: `values` phải là số nguyên (như /predict/
+    từ chối 0.4), còn range start/stop/num được làm tròn về số nguyên gần nhất;
+    miền hợp lệ được kiểm tra trên giá trị sau làm tròn.
+    """
+    values = axis.to_array()
+    if UdemyPredictionBase.model_fields[name].annotation is not int:
+        return values
+    if axis.values is not None and (values != np.rint(values)).any():
+        raise ValueError(f"{name} là field số nguyên, `values` không được có phần thập phân")
+    return np.rint(values)
+
+
+def _field_bounds(name: str):
+    """(min, max, min inclusive) của một field theo ràng buộc của UdemyPredictionBase"""
+    low, high, low_inclusive = -np.inf, np.inf, True
+    for constraint in UdemyPredictionBase.model_fields[name].metadata:
+        if getattr(constraint, 'ge', None) is not None:
+            low = constraint.ge
+        if getattr(constraint, 'gt', None) is not None:
+            low, low_inclusive = constraint.gt, False
+        if getattr(constraint, 'le', None) is not None:
+            high = constraint.le
+    return low, high, low_inclusive
+
+
+class SweepAxisResult(BaseModel):
+    field: str
+    values: List[float]
+
+
+class PredictionSweepResponse(BaseModel):
+    """
+    Lưới xác suất Bestseller: probabilities[i][j]... ứng với axes[0].values[i],
+    axes[1].values[j], ... (các field khác lấy từ base). Không lưu vào database.
+    """
+    axes: List[SweepAxisResult]
+    shape: List[int]
+    probabilities: List[Any]
+    scenarios: int
+    tier: str
+    elapsed_ms: float
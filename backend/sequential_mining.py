@@ -6,117 +6,280 @@ Implement pattern-based learning path recommendation theo notebook 03_data-minin
 import pandas as pd
 import numpy as np
 import ast
-import re
 from typing import List, Dict, Any, Tuple, Optional
 from pathlib import Path
 from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
-from prefixspan import PrefixSpan
+import heapq
+import json
+import re
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from catalogue import file_version, read_catalogue
+from similar_courses import SimilarCourseIndex, course_payload
+
+# Tăng khi cấu trúc topic catalogue thay đổi (để ETag cũ không còn hợp lệ)
+TOPIC_CATALOGUE_SCHEMA = 1
+
+# Sharding (tùy chọn, mặc định tắt): chiều shard dựng sẵn khi khởi động
+# ("language", "category" hoặc "language,category"); filter vẫn được phục vụ khi tắt,
+# shard tương ứng dựng khi có request đầu tiên
+SHARD_DIMENSIONS = ('language', 'category')
+RECOMMENDER_SHARD_BY = [
+    dim.strip() for dim in os.getenv("RECOMMENDER_SHARD_BY", "").split(",")
+    if dim.strip() in SHARD_DIMENSIONS
+]
+# Shard nhỏ hơn ngưỡng không dựng sẵn (dựng khi có request đầu tiên)
+RECOMMENDER_SHARD_MIN_COURSES = int(os.getenv("RECOMMENDER_SHARD_MIN_COURSES", "100"))
+RECOMMENDER_SHARD_WORKERS = int(os.getenv("RECOMMENDER_SHARD_WORKERS", str(os.cpu_count() or 1)))
+# Min support của shard tính theo tỉ lệ số sequences (min_support=10 tuyệt đối là quá
+# cao cho shard nhỏ); ~ 10 / 243 sequences của catalogue toàn cục
+SHARD_MIN_SUPPORT_RATIO = float(os.getenv("SHARD_MIN_SUPPORT_RATIO", "0.04"))
+
+
+# Skill categories
+SKILL_CATEGORIES = {
+    'programming_languages': ['python', 'java', 'javascript', 'r programming', 'sql'],
+    'ml_frameworks': ['tensorflow', 'pytorch', 'keras', 'scikit', 'scikit learn'],
+    'ml_concepts': ['machine learning', 'deep learning', 'neural network', 'ai'],
+    'data_tools': ['pandas', 'numpy', 'matplotlib', 'tableau', 'excel'],
+    'specialized': ['nlp', 'computer vision', 'reinforcement learning', 'time series'],
+    'cloud_devops': ['aws', 'azure', 'docker', 'kubernetes', 'mlops']
+}
+
+ALL_SKILLS = [skill for category in SKILL_CATEGORIES.values() for skill in category]
+
+
+# Career-specific keywords mapping
+CAREER_KEYWORDS = {
+    'AI Engineer': ['ai', 'machine learning', 'deep learning', 'neural network'],
+    'ML Engineer': ['machine learning', 'mlops', 'deployment', 'aws', 'tensorflow', 'pytorch'],
+    'Data Scientist': ['data science', 'machine learning', 'statistics', 'python', 'pandas', 'r'],
+    'Web Developer': ['web development', 'html', 'css', 'javascript', 'react', 'frontend'],
+    'Python Developer': ['python', 'django', 'flask', 'api', 'backend'],
+    'React JS': ['react', 'javascript', 'frontend', 'web development'],
+    'Machine Learning': ['machine learning', 'ai', 'deep learning', 'python'],
+}
+
+# Skill-transition graph: cạnh A -> B cần support (số sequence học A trước B) tối thiểu
+# bằng GRAPH_SUPPORT_FRACTION * min_support của patterns
+GRAPH_SUPPORT_FRACTION = 0.3
+# Số skill tối đa của một learning path, số khóa học cache cho mỗi skill
+MAX_PATH_SKILLS = 6
+COURSES_PER_SKILL = 20
+
+
+def career_keywords(career_goal: str) -> List[str]:
+    """Keywords của career goal (mapping có sẵn, hoặc tách từ)"""
+    return CAREER_KEYWORDS.get(career_goal, [word.lower() for word in career_goal.split()])
+
+
+def prerequisite_order(edges: Dict[Tuple[str, str], int]) -> List[str]:
+    """
+    Một thứ tự toàn cục của các skill sao cho tổng support của các cạnh đi ngược
+    thứ tự nhỏ nhất có thể (heuristic feedback arc set của Eades-Lin-Smyth, có trọng số):
+    lần lượt đưa sink về cuối, source lên đầu, còn lại thì đưa skill có
+    (support ra - support vào) lớn nhất lên đầu. Hòa thì theo tên để kết quả ổn định.
+    """
+    successors: Dict[str, Dict[str, int]] = {}
+    predecessors: Dict[str, Dict[str, int]] = {}
+    for (a, b), support in edges.items():
+        successors.setdefault(a, {})[b] = support
+        predecessors.setdefault(b, {})[a] = support
+        successors.setdefault(b, {})
+        predecessors.setdefault(a, {})
+
+    remaining = set(successors)
+    front, back = [], []
+
+    def remove(skill):
+        remaining.discard(skill)
+        for other in successors.pop(skill):
+            predecessors[other].pop(skill, None)
+        for other in predecessors.pop(skill):
+            successors[other].pop(skill, None)
+
+    while remaining:
+        sinks = sorted(skill for skill in remaining if not successors[skill])
+        sources = sorted(skill for skill in remaining if not predecessors[skill] and successors[skill])
+        if sinks:
+            for skill in sinks:
+                back.append(skill)
+                remove(skill)
+        elif sources:
+            for skill in sources:
+                front.append(skill)
+                remove(skill)
+        else:
+            skill = max(sorted(remaining), key=lambda skill: (
+                sum(successors[skill].values()) - sum(predecessors[skill].values())))
+            front.append(skill)
+            remove(skill)
+    return front + back[::-1]
+
+
+def widest_prerequisite_path(graph, target: str, max_skills: int = MAX_PATH_SKILLS) -> List[str]:
+    """
+    Prerequisite path root -> ... -> target có support của cạnh yếu nhất lớn nhất
+    (widest path, Dijkstra max-min đi ngược từ target). Path bắt đầu từ một skill gốc
+    (không có tiền đề) - nếu chọn nguồn bất kỳ thì cạnh trực tiếp vào target luôn thắng.
+    Hòa thì ưu tiên path ngắn hơn. Path giữ tối đa max_skills skill cuối;
+    target không có tiền đề -> [target].
+    """
+    width = {target: float('inf')}
+    next_skill = {target: None}
+    hops = {target: 0}
+    heap = [(-width[target], 0, target)]
+    done = set()
+    while heap:
+        _, h, skill = heapq.heappop(heap)
+        if skill in done:
+            continue
+        done.add(skill)
+        for prev in graph.predecessors(skill):
+            if prev in done:
+                continue
+            candidate = (min(width[skill], graph[prev][skill]['support']), -(h + 1))
+            if candidate > (width.get(prev, 0), -hops.get(prev, 0)):
+                width[prev], next_skill[prev], hops[prev] = candidate[0], skill, h + 1
+                heapq.heappush(heap, (-candidate[0], h + 1, prev))
+
+    sources = [skill for skill in width if skill != target and graph.in_degree(skill) == 0]
+    if not sources:
+        return [target]
+    path = [max(sources, key=lambda skill: (width[skill], -hops[skill]))]
+    while path[-1] != target:
+        path.append(next_skill[path[-1]])
+    return path[-max_skills:]
+
+
+# So khớp theo ranh giới từ: 'ai' không khớp "email", 'java' không khớp "javascript"
+_SKILL_PATTERNS = [(skill, re.compile(r'\b' + re.escape(skill) + r'\b')) for skill in ALL_SKILLS]
+
+
+def extract_skills_from_text(text) -> List[str]:
+    text_lower = str(text).lower()
+    return [skill for skill, pattern in _SKILL_PATTERNS if pattern.search(text_lower)]
+
+
+def add_skill_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Thêm full_content (title + headline + related_topics) và extracted_skills (in-place)"""
+    df['full_content'] = (
+        df.get('title', pd.Series([''] * len(df), index=df.index)).fillna('') + ' ' +
+        df.get('headline', pd.Series([''] * len(df), index=df.index)).fillna('') + ' ' +
+        df.get('related_topics', pd.Series([''] * len(df), index=df.index)).fillna('')
+    )
+    df['extracted_skills'] = df['full_content'].apply(extract_skills_from_text)
+    return df
+
+
+def top_level_category(related_topics: pd.Series) -> pd.Series:
+    """'Python, Programming Languages, Development' -> 'Development' (breadcrumb cuối)"""
+    return related_topics.fillna('').astype(str).str.split(',').str[-1].str.strip()
+
+
+def _dimension_values(column: pd.Series) -> pd.Series:
+    """Giá trị của một chiều shard đã chuẩn hóa như _normalize (NaN -> '')"""
+    return column.fillna('').astype(str).str.strip().str.casefold()
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    value = (value or '').strip().casefold()
+    return value or None
+
+
+def load_prepared_catalogue(data_path: Path) -> Tuple[pd.DataFrame, Optional[str]]:
+    """Đọc catalogue, bỏ trùng title, thêm cột category -> (df, data_version)"""
+    if not data_path.exists():
+        print(f"Warning: Data file not found at {data_path}")
+        return pd.DataFrame(), None
+    
+    # Schema tường minh + parse số/thời lượng vector hóa ngay khi đọc
+    df = read_catalogue(data_path)
+    data_version = file_version(data_path)
+    
+    # Remove duplicates
+    if 'title' in df.columns:
+        df = df.drop_duplicates(subset=['title'], keep='first')
+    
+    # Category cấp cao nhất - một trong các chiều shard
+    if 'related_topics' in df.columns:
+        df['category'] = top_level_category(df['related_topics'])
+    return df, data_version
+
 
 class SequentialMiningRecommender:
     """Class xử lý sequential mining và recommendation dựa trên PrefixSpan"""
     
-    def __init__(self, data_path: str = "data_final_fix.csv"):
+    def __init__(self, data_path: str = "data_final_fix.csv",
+                 df: Optional[pd.DataFrame] = None, data_version: Optional[str] = None,
+                 min_support_ratio: Optional[float] = None):
         """
         Khởi tạo recommender với data
         
         Args:
             data_path: Đường dẫn tới file CSV chứa dữ liệu khóa học
+            df: Catalogue đã load sẵn (vd. một shard) - bỏ qua bước đọc file
+            data_version: Version của df (dùng cho ETag của topic catalogue)
+            min_support_ratio: Min support theo tỉ lệ số sequences (None = min_support=10)
         """
-        # Try to find CSV file in multiple locations
-        possible_paths = [
-            Path(__file__).parent / data_path,
-            Path(__file__).parent.parent / data_path,
-            Path(__file__).parent.parent / "data_final_fix.csv",
-        ]
-        
-        self.data_path = None
-        for path in possible_paths:
-            if path.exists():
-                self.data_path = path
-                break
-        
-        if self.data_path is None:
-            self.data_path = possible_paths[0]
+        self.data_path = self._resolve_data_path(data_path)
         
         # Data containers
         self.df = None
         self.df_processed = None
         self.sequences = []
         self.patterns = []
+        self.data_version = None
+        self.topic_catalogue = {}
+        self.topic_catalogue_bytes = b""
+        self.topic_catalogue_etag = ""
+        self.shard = "global"
+        self.min_support_ratio = min_support_ratio
+        self.min_support = None
+        self.skill_graph = None
+        self.skill_order: List[str] = []
+        self.skill_paths: Dict[str, List[str]] = {}
+        self.skill_courses: Dict[str, List[Dict[str, Any]]] = {}
         
         # Load và xử lý data
-        self._load_and_prepare_data()
+        if df is None:
+            self._load_and_prepare_data()
+        else:
+            self.df = df.copy()
+            self.data_version = data_version
+        if self.df.empty:
+            self._build_topic_catalogue()
+            return
         self._extract_skills()
         self._estimate_difficulty()
         self._create_sequences()
         self._mine_patterns()
+        self._build_skill_graph()
+        self._build_topic_catalogue()
+    
+    @staticmethod
+    def _resolve_data_path(data_path: str) -> Path:
+        """Try to find CSV file in multiple locations"""
+        possible_paths = [
+            Path(__file__).parent / data_path,
+            Path(__file__).parent.parent / data_path,
+            Path(__file__).parent.parent / "data_final_fix.csv",
+        ]
+        for path in possible_paths:
+            if path.exists():
+                return path
+        return possible_paths[0]
     
     def _load_and_prepare_data(self):
         """Load và prepare data giống notebook"""
-        if not self.data_path.exists():
-            print(f"Warning: Data file not found at {self.data_path}")
-            self.df = pd.DataFrame()
-            return
-        
-        self.df = pd.read_csv(self.data_path)
-        print(f"Loaded {len(self.df)} courses")
-        
-        # Clean numeric columns
-        if 'num_students' in self.df.columns:
-            self.df['num_students'] = self.df['num_students'].astype(str).str.replace(',', '').astype(float)
-        if 'num_reviews' in self.df.columns:
-            self.df['num_reviews'] = self.df['num_reviews'].astype(str).str.replace(',', '').astype(float)
-        if 'discount' in self.df.columns:
-            self.df['discount'] = self.df['discount'].astype(str).str.replace('%', '').astype(float) / 100
-        
-        # Parse duration
-        def parse_duration(duration_str):
-            if pd.isna(duration_str):
-                return None
-            hours = re.search(r'(\d+)h', str(duration_str))
-            minutes = re.search(r'(\d+)m', str(duration_str))
-            total = (int(hours.group(1)) if hours else 0) * 60
-            total += (int(minutes.group(1)) if minutes else 0)
-            return total
-        
-        if 'total_length' in self.df.columns:
-            self.df['duration_minutes'] = self.df['total_length'].apply(parse_duration)
-        
-        # Remove duplicates
-        if 'title' in self.df.columns:
-            self.df = self.df.drop_duplicates(subset=['title'], keep='first')
+        self.df, self.data_version = load_prepared_catalogue(self.data_path)
     
     def _extract_skills(self):
         """Extract skills từ content dùng TF-IDF và keyword matching"""
-        # Combine text fields
-        self.df['full_content'] = (
-            self.df.get('title', pd.Series([''] * len(self.df))).fillna('') + ' ' + 
-            self.df.get('headline', pd.Series([''] * len(self.df))).fillna('') + ' ' + 
-            self.df.get('related_topics', pd.Series([''] * len(self.df))).fillna('')
-        )
-        
-        # Skill categories
-        SKILL_CATEGORIES = {
-            'programming_languages': ['python', 'java', 'javascript', 'r programming', 'sql'],
-            'ml_frameworks': ['tensorflow', 'pytorch', 'keras', 'scikit', 'scikit learn'],
-            'ml_concepts': ['machine learning', 'deep learning', 'neural network', 'ai'],
-            'data_tools': ['pandas', 'numpy', 'matplotlib', 'tableau', 'excel'],
-            'specialized': ['nlp', 'computer vision', 'reinforcement learning', 'time series'],
-            'cloud_devops': ['aws', 'azure', 'docker', 'kubernetes', 'mlops']
-        }
-        
-        ALL_SKILLS = [skill for category in SKILL_CATEGORIES.values() for skill in category]
-        
-        def extract_skills_from_text(text):
-            text_lower = str(text).lower()
-            found_skills = []
-            for skill in ALL_SKILLS:
-                if skill in text_lower:
-                    found_skills.append(skill)
-            return found_skills
-        
-        self.df['extracted_skills'] = self.df['full_content'].apply(extract_skills_from_text)
+        add_skill_columns(self.df)
         print(f"Extracted skills for {len(self.df)} courses")
     
     def _estimate_difficulty(self):
@@ -204,9 +367,126 @@ class SequentialMiningRecommender:
             self.patterns = []
             return
         
+        if self.min_support_ratio is not None:
+            min_support = max(2, int(np.ceil(self.min_support_ratio * len(self.sequences))))
+        
+        # Import lazy: prefixspan chỉ cần khi build recommender
+        from prefixspan import PrefixSpan
         ps = PrefixSpan(self.sequences)
         self.patterns = ps.frequent(minsup=min_support)
+        self.min_support = min_support
         print(f"Mined {len(self.patterns)} patterns with min_support={min_support}")
+
+    def _build_skill_graph(self):
+        """
+        Skill-transition graph (có hướng, có trọng số) từ support của các cặp <A> -> <B>
+        trong sequences, tính sẵn khi build:
+        - cạnh A -> B giữ hướng có support lớn hơn (B -> A bị loại), rồi chỉ giữ các cạnh
+          thuận theo một thứ tự toàn cục (prerequisite_order) nên graph không có chu trình
+          và mọi path đều nhất quán với nhau
+        - skill_paths[target]: prerequisite path kết thúc tại target có cạnh yếu nhất
+          mạnh nhất (xem widest_prerequisite_path)
+        - skill_courses[skill]: khóa học phổ biến nhất chứa skill
+        Query /recommend/ chỉ còn là dict lookup.
+        """
+        # Import lazy: networkx chỉ cần khi build recommender
+        import networkx as nx
+
+        pair_support = Counter()
+        for sequence in self.sequences:
+            position = {skill: i for i, itemset in enumerate(sequence) for skill in itemset}
+            for a, i in position.items():
+                for b, j in position.items():
+                    if i < j:
+                        pair_support[(a, b)] += 1
+
+        min_edge_support = max(2, round((self.min_support or 10) * GRAPH_SUPPORT_FRACTION))
+        candidates = {
+            (a, b): support for (a, b), support in pair_support.items()
+            if support >= min_edge_support and support > pair_support.get((b, a), 0)
+        }
+        order = prerequisite_order(candidates)
+        rank = {skill: i for i, skill in enumerate(order)}
+        graph = nx.DiGraph()
+        graph.add_nodes_from(order)
+        for (a, b), support in candidates.items():
+            if rank[a] < rank[b]:
+                graph.add_edge(a, b, support=support)
+
+        skill_paths = {target: widest_prerequisite_path(graph, target) for target in graph.nodes}
+
+        skill_courses = {skill: [] for skill in graph.nodes}
+        if skill_courses:
+            ranked = self.df.sort_values('num_students', ascending=False)
+            for row in ranked.to_dict('records'):
+                # Đúng field của course trong step, dựng một lần khi build
+                step_course = course_payload(row)
+                del step_course['skills']
+                for skill in row.get('extracted_skills', []):
+                    courses = skill_courses.get(skill)
+                    if courses is not None and len(courses) < COURSES_PER_SKILL:
+                        courses.append(step_course)
+
+        self.skill_graph = graph
+        self.skill_order = order
+        self.skill_paths = skill_paths
+        self.skill_courses = skill_courses
+        print(f"Built skill graph: {graph.number_of_nodes()} skills, {graph.number_of_edges()} edges "
+              f"(min_support={min_edge_support}, {len(candidates) - graph.number_of_edges()} cạnh ngược thứ tự bị bỏ)")
+
+    def _resolve_target_skill(self, target_topic: str) -> Optional[str]:
+        """Skill đích trong graph: chính target_topic, hoặc keyword của career goal có path dài nhất"""
+        goal = target_topic.strip().lower()
+        if goal in self.skill_paths:
+            return goal
+        candidates = [kw for kw in career_keywords(target_topic.strip()) if kw in self.skill_paths]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda kw: len(self.skill_paths[kw]))
+    
+    def _build_topic_catalogue(self):
+        """
+        Tính topic catalogue một lần khi build recommender và serialize sẵn thành bytes:
+        - topics: các giá trị related_topics (tách theo dấu phẩy), sort theo số khóa học
+        - topic_counts: số khóa học theo từng topic
+        - skills: skill đã extract, kèm số khóa học và tổng support trong patterns
+        """
+        topic_counts = Counter()
+        if 'related_topics' in self.df.columns:
+            for value in self.df['related_topics'].dropna():
+                topic_counts.update({t.strip() for t in str(value).split(',') if t.strip()})
+        
+        skill_counts = Counter()
+        if 'extracted_skills' in self.df.columns:
+            for skills in self.df['extracted_skills']:
+                skill_counts.update(skills)
+        
+        skill_support = Counter()
+        for support, pattern in self.patterns:
+            for itemset in pattern:
+                items = itemset if isinstance(itemset, (list, tuple)) else [itemset]
+                for skill in set(items):
+                    skill_support[skill] += support
+        
+        topics = [topic for topic, _ in sorted(topic_counts.items(), key=lambda kv: (-kv[1], kv[0]))]
+        self.topic_catalogue = {
+            "topics": topics,
+            "count": len(topics),
+            "topic_counts": {topic: topic_counts[topic] for topic in topics},
+            "skills": [
+                {"skill": skill, "course_count": count, "pattern_support": skill_support.get(skill, 0)}
+                for skill, count in sorted(skill_counts.items(), key=lambda kv: (-kv[1], kv[0]))
+            ],
+            "total_courses": int(len(self.df)),
+            "data_version": self.data_version,
+        }
+        self.topic_catalogue_bytes = json.dumps(self.topic_catalogue, ensure_ascii=False).encode("utf-8")
+        self.topic_catalogue_etag = f'"{(self.data_version or "nodata")[:16]}-v{TOPIC_CATALOGUE_SCHEMA}"'
+        print(f"Built topic catalogue: {len(topics)} topics, {len(skill_counts)} skills")
+    
+    def get_available_topics(self) -> List[str]:
+        """Danh sách topics (related_topics) có trong data, sort theo số khóa học"""
+        return self.topic_catalogue.get("topics", [])
     
     def get_recommendations(self, career_goal: str, max_courses: int = 7) -> List[Dict[str, Any]]:
         """
@@ -222,20 +502,8 @@ class SequentialMiningRecommender:
         if self.df is None or self.df.empty:
             return []
         
-        # Career-specific keywords mapping
-        career_keywords_map = {
-            'AI Engineer': ['ai', 'machine learning', 'deep learning', 'neural network'],
-            'ML Engineer': ['machine learning', 'mlops', 'deployment', 'aws', 'tensorflow', 'pytorch'],
-            'Data Scientist': ['data science', 'machine learning', 'statistics', 'python', 'pandas', 'r'],
-            'Web Developer': ['web development', 'html', 'css', 'javascript', 'react', 'frontend'],
-            'Python Developer': ['python', 'django', 'flask', 'api', 'backend'],
-            'React JS': ['react', 'javascript', 'frontend', 'web development'],
-            'Machine Learning': ['machine learning', 'ai', 'deep learning', 'python'],
-        }
-        
         # Try to match career_goal
-        keywords = career_keywords_map.get(career_goal, 
-                                           [word.lower() for word in career_goal.split()])
+        keywords = career_keywords(career_goal)
         
         # Find relevant patterns
         relevant_patterns = []
@@ -258,7 +526,7 @@ class SequentialMiningRecommender:
         
         # Score courses
         scored_courses = []
-        for idx, row in self.df.iterrows():
+        for row in self.df.to_dict('records'):
             course_skills = set(row.get('extracted_skills', []))
             pattern_score = sum(skill_importance[skill] for skill in course_skills 
                               if skill in skill_importance)
@@ -309,6 +577,17 @@ class SequentialMiningRecommender:
         
         return selected[:max_courses]
     
+    def search_courses_by_keyword(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Khóa học có keyword trong title (ưu tiên) hoặc full_content, sort theo số học viên"""
+        keyword = (keyword or '').strip()
+        if self.df is None or self.df.empty or not keyword:
+            return []
+        in_title = self.df['title'].fillna('').str.contains(keyword, case=False, regex=False)
+        in_content = self.df['full_content'].fillna('').str.contains(keyword, case=False, regex=False)
+        matches = self.df[in_title | in_content].assign(_in_title=in_title)
+        matches = matches.sort_values(['_in_title', 'num_students'], ascending=[False, False])
+        return [course_payload(row) for row in matches.head(limit).to_dict('records')]
+    
     def get_full_recommendation(
         self,
         target_topic: str,
@@ -326,7 +605,11 @@ class SequentialMiningRecommender:
         Returns:
             Dict với recommendations
         """
-        # Get courses
+        target_skill = self._resolve_target_skill(target_topic)
+        if target_skill is not None and len(self.skill_paths[target_skill]) >= 2:
+            return self._skill_path_recommendation(target_topic, target_skill, max_steps, courses_per_step)
+
+        # Fallback: nhóm khóa học theo difficulty
         courses = self.get_recommendations(target_topic, max_courses=courses_per_step * 3)
         
         if not courses:
@@ -386,17 +669,198 @@ class SequentialMiningRecommender:
             "message": "Tìm thấy learning path",
             "target_topic": target_topic,
             "path": path[:len(steps)],
+            "path_type": "difficulty",
             "total_steps": len(steps),
             "steps": steps
         }
 
+    def _skill_path_recommendation(self, target_topic: str, target_skill: str,
+                                   max_steps: Optional[int], courses_per_step: int) -> Dict[str, Any]:
+        """Learning path theo thứ tự prerequisite của skill graph (path đã tính sẵn)"""
+        path = self.skill_paths[target_skill]
+        if max_steps:
+            path = path[-max_steps:]
+
+        steps, used = [], set()
+        for step_number, skill in enumerate(path, start=1):
+            courses = []
+            for course in self.skill_courses.get(skill, []):
+                if course['url'] in used:
+                    continue
+                used.add(course['url'])
+                courses.append(course)
+                if len(courses) >= courses_per_step:
+                    break
+            steps.append({
+                "step_number": step_number,
+                "topic": skill,
+                "courses": courses,
+                "has_courses": len(courses) > 0
+            })
+
+        return {
+            "success": True,
+            "message": "Tìm thấy learning path",
+            "target_topic": target_topic,
+            "target_skill": target_skill,
+            "path": list(path),
+            "path_type": "skill_graph",
+            "total_steps": len(steps),
+            "steps": steps
+        }
+
+
+def _build_shard(df: pd.DataFrame, data_version: Optional[str], name: str) -> SequentialMiningRecommender:
+    """Chạy trong worker process: sequences, patterns, catalogue riêng của shard"""
+    recommender = SequentialMiningRecommender(df=df, data_version=data_version,
+                                              min_support_ratio=SHARD_MIN_SUPPORT_RATIO)
+    recommender.shard = name
+    return recommender
+
+
+class ShardedRecommender:
+    """
+    Recommender toàn cục + các shard theo (language, category).
+
+    - Shard có ít nhất RECOMMENDER_SHARD_MIN_COURSES khóa học theo các chiều
+      `shard_by` được dựng song song trong process pool lúc khởi động, cùng lúc
+      process chính dựng recommender toàn cục.
+    - Tổ hợp filter khác (shard nhỏ, chiều không dựng sẵn) được dựng khi có
+      request đầu tiên và cache lại.
+    """
+
+    def __init__(self, data_path: str = "data_final_fix.csv", shard_by: Optional[List[str]] = None,
+                 min_courses: int = RECOMMENDER_SHARD_MIN_COURSES,
+                 workers: int = RECOMMENDER_SHARD_WORKERS,
+                 df: Optional[pd.DataFrame] = None, data_version: Optional[str] = None):
+        """
+        Args:
+            df: Catalogue đã load sẵn (cùng cột với load_prepared_catalogue) - bỏ qua bước đọc file
+            data_version: Version của df
+        """
+        self.shard_by = list(RECOMMENDER_SHARD_BY if shard_by is None else shard_by)
+        self.shards: Dict[Tuple[Optional[str], Optional[str]], SequentialMiningRecommender] = {}
+        self.build_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        t0 = time.perf_counter()
+        if df is None:
+            self.df, self.data_version = load_prepared_catalogue(
+                SequentialMiningRecommender._resolve_data_path(data_path)
+            )
+        else:
+            self.df, self.data_version = df, data_version
+
+        keys = self._prebuilt_keys(min_courses)
+        if not keys or workers <= 1:
+            self.global_recommender = SequentialMiningRecommender(df=self.df, data_version=self.data_version)
+            for key in keys:
+                self.shards[key] = _build_shard(self._shard_frame(key), self.data_version, shard_name(key))
+        else:
+            # spawn: an toàn khi process chính đã có thread (vd. model warm-up)
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(workers, len(keys)), mp_context=context) as pool:
+                futures = {key: pool.submit(_build_shard, self._shard_frame(key), self.data_version, shard_name(key))
+                           for key in keys}
+                self.global_recommender = SequentialMiningRecommender(df=self.df, data_version=self.data_version)
+                for key, future in futures.items():
+                    self.shards[key] = future.result()
+        self.similar_index = SimilarCourseIndex(ALL_SKILLS).build(self.global_recommender.df)
+        self.similar_index_version = self.data_version
+        self.build_seconds["total"] = round(time.perf_counter() - t0, 3)
+        print(f"Built {len(self.shards)} recommender shards (shard_by={self.shard_by}) "
+              f"in {self.build_seconds['total']:.2f}s")
+
+    def _prebuilt_keys(self, min_courses: int) -> List[Tuple[Optional[str], Optional[str]]]:
+        if not self.shard_by or self.df.empty:
+            return []
+        columns = [dim for dim in SHARD_DIMENSIONS if dim in self.shard_by and dim in self.df.columns]
+        if not columns:
+            return []
+        # Giá trị trống/NaN không thành shard (astype(str) sẽ biến NaN thành key 'nan')
+        sizes = self.df[columns].apply(_dimension_values).value_counts()
+        keys = []
+        for values, size in sizes.items():
+            values = dict(zip(columns, values if isinstance(values, tuple) else (values,)))
+            if size >= min_courses and all(values.values()):
+                keys.append((values.get('language'), values.get('category')))
+        return keys
+
+    def _shard_frame(self, key: Tuple[Optional[str], Optional[str]]) -> pd.DataFrame:
+        mask = pd.Series(True, index=self.df.index)
+        for column, value in zip(SHARD_DIMENSIONS, key):
+            if value is not None:
+                if column not in self.df.columns:
+                    return self.df.iloc[0:0]
+                mask &= _dimension_values(self.df[column]) == value
+        return self.df[mask]
+
+    def get(self, language: Optional[str] = None, category: Optional[str] = None) -> SequentialMiningRecommender:
+        """Recommender cho filter (None = toàn bộ catalogue)"""
+        key = (_normalize(language), _normalize(category))
+        if key == (None, None):
+            return self.global_recommender
+        shard = self.shards.get(key)
+        if shard is None:
+            with self._lock:
+                shard = self.shards.get(key)
+                if shard is None:
+                    frame = self._shard_frame(key)
+                    if frame.empty:
+                        # Không cache filter không khớp khóa học nào (input tùy ý của client)
+                        empty = SequentialMiningRecommender(df=frame, data_version=self.data_version)
+                        empty.shard = shard_name(key)
+                        return empty
+                    t0 = time.perf_counter()
+                    shard = _build_shard(frame, self.data_version, shard_name(key))
+                    self.shards[key] = shard
+                    self.build_seconds[shard_name(key)] = round(time.perf_counter() - t0, 3)
+        return shard
+
+    def refresh_similar_courses(self, data_path: Optional[Path] = None) -> int:
+        """
+        Đọc lại catalogue và thêm khóa học mới (chưa có course_url/title) vào
+        similar-course index, không build lại toàn bộ. Trả về số khóa học đã thêm.
+        """
+        path = Path(data_path) if data_path else self.global_recommender.data_path
+        df, data_version = load_prepared_catalogue(path)
+        if df.empty:
+            return 0
+        with self._lock:
+            if data_version == self.similar_index_version:
+                return 0
+            added = self.similar_index.add_courses(add_skill_columns(df))
+            self.similar_index_version = data_version
+        return added
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Danh sách shard đã dựng (tên, số khóa học, số patterns)"""
+        return [
+            {"shard": shard_name(key), "language": key[0], "category": key[1],
+             "courses": int(len(shard.df)), "patterns": len(shard.patterns)}
+            for key, shard in sorted(self.shards.items(), key=lambda kv: shard_name(kv[0]))
+        ]
+
+
+def shard_name(key: Tuple[Optional[str], Optional[str]]) -> str:
+    parts = [f"{dim}={value}" for dim, value in zip(SHARD_DIMENSIONS, key) if value is not None]
+    return "|".join(parts) or "global"
+
 
 # Singleton instance
 _recommender_instance = None
+_recommender_lock = threading.Lock()
 
-def get_recommender() -> SequentialMiningRecommender:
-    """Get singleton instance của recommender"""
+def get_sharded_recommender() -> ShardedRecommender:
+    """Get singleton instance của recommender (toàn cục + shards)"""
     global _recommender_instance
     if _recommender_instance is None:
-        _recommender_instance = SequentialMiningRecommender()
+        with _recommender_lock:
+            if _recommender_instance is None:
+                _recommender_instance = ShardedRecommender()
     return _recommender_instance
+
+
+def get_recommender(language: Optional[str] = None, category: Optional[str] = None) -> SequentialMiningRecommender:
+    """Recommender toàn cục, hoặc shard tương ứng khi có filter language/category"""
+    return get_sharded_recommender().get(language=language, category=category)
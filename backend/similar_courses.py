@@ -0,0 +1,285 @@
+"""
+Similar Courses - Danh sách khóa học tương tự tính sẵn (nearest neighbors)
+
+Similarity = SIMILAR_TEXT_WEIGHT * cosine(TF-IDF full_content)
+           + (1 - SIMILAR_TEXT_WEIGHT) * Jaccard(extracted_skills)
+
+Ma trận similarity n x n không bao giờ được tạo đầy đủ: tích sparse được tính theo
+block dòng, mỗi block chỉ giữ lại top-k. Kết quả lưu gọn dưới dạng
+neighbors (int32, n x k) + scores (float16, n x k), nên lookup chỉ là O(k).
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+SIMILAR_COURSES_K = int(os.getenv("SIMILAR_COURSES_K", "20"))
+SIMILAR_TEXT_WEIGHT = float(os.getenv("SIMILAR_TEXT_WEIGHT", "0.7"))
+SIMILAR_BLOCK_SIZE = int(os.getenv("SIMILAR_BLOCK_SIZE", "512"))
+
+
+def course_payload(row) -> Dict[str, Any]:
+    """Thông tin khóa học trả về cho client (cùng field với Course của /recommend/)"""
+    def number(value, cast=float):
+        return cast(value) if pd.notna(value) else cast(0)
+
+    return {
+        'title': row.get('title', 'Unknown'),
+        'rating': number(row.get('rating')),
+        'students': number(row.get('num_students'), int),
+        'is_bestseller': str(row.get('is_bestseller', '')).strip().lower() in ('yes', 'true', '1'),
+        'instructor': row.get('instructor', 'Unknown'),
+        'price': number(row.get('price')),
+        'lectures': number(row.get('lectures'), int),
+        'sections': number(row.get('sections'), int),
+        'duration': str(row.get('total_length', '')),
+        'url': row.get('course_url', ''),
+        'skills': list(row.get('extracted_skills', [])),
+    }
+
+
+class _IndexState:
+    """
+    Snapshot của index (vectors, neighbors/scores, lookup). Không bị sửa sau khi tạo:
+    refresh dựng snapshot mới rồi thay cả object, nên query luôn đọc một trạng thái nhất quán.
+    """
+
+    __slots__ = ('text_vectors', 'skill_vectors', 'skill_sizes', 'neighbors', 'scores',
+                 'courses', 'row_by_url', 'row_by_title')
+
+    def __init__(self, text_vectors, skill_vectors, skill_sizes: np.ndarray, neighbors: np.ndarray,
+                 scores: np.ndarray, courses: List[Dict[str, Any]],
+                 row_by_url: Dict[str, int], row_by_title: Dict[str, int]):
+        self.text_vectors = text_vectors      # CSR (n x V), dòng đã chuẩn hóa L2
+        self.skill_vectors = skill_vectors    # CSR (n x S), nhị phân
+        self.skill_sizes = skill_sizes
+        self.neighbors = neighbors
+        self.scores = scores
+        self.courses = courses
+        self.row_by_url = row_by_url
+        self.row_by_title = row_by_title
+
+
+class SimilarCourseIndex:
+    """Top-k khóa học tương tự cho mỗi khóa học, tính sẵn theo block"""
+
+    def __init__(self, skill_vocabulary: Sequence[str], k: int = SIMILAR_COURSES_K,
+                 text_weight: float = SIMILAR_TEXT_WEIGHT, block_size: int = SIMILAR_BLOCK_SIZE):
+        self.k = k
+        self.text_weight = text_weight
+        self.block_size = block_size
+        self.skill_vocabulary = list(skill_vocabulary)
+        self._skill_column = {skill: i for i, skill in enumerate(self.skill_vocabulary)}
+
+        self.vectorizer = None
+        self._state = _IndexState(None, None, np.zeros(0, dtype=np.float32),
+                                  np.zeros((0, k), dtype=np.int32), np.zeros((0, k), dtype=np.float16),
+                                  [], {}, {})
+        # Chỉ serialize các lần build/refresh với nhau; query không cần lock
+        self._write_lock = threading.Lock()
+        self.build_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._state.courses)
+
+    @property
+    def neighbors(self) -> np.ndarray:
+        return self._state.neighbors
+
+    @property
+    def scores(self) -> np.ndarray:
+        return self._state.scores
+
+    @property
+    def courses(self) -> List[Dict[str, Any]]:
+        return self._state.courses
+
+    # ---------- build ----------
+
+    def build(self, df: pd.DataFrame) -> "SimilarCourseIndex":
+        """
+        Fit TF-IDF trên full_content và tính top-k cho toàn bộ catalogue.
+        df cần các cột full_content và extracted_skills (xem add_skill_columns).
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        with self._write_lock:
+            t0 = time.perf_counter()
+            vectorizer = TfidfVectorizer(stop_words='english', sublinear_tf=True,
+                                         min_df=2, dtype=np.float32)
+            text_vectors = vectorizer.fit_transform(df['full_content'].fillna('').astype(str)).tocsr()
+            skill_vectors = self._skill_matrix(df['extracted_skills'])
+            skill_sizes = np.asarray(skill_vectors.sum(axis=1), dtype=np.float32).ravel()
+            courses, row_by_url, row_by_title = self._register(df, [], {}, {})
+
+            n = len(df)
+            neighbors = np.full((n, self.k), -1, dtype=np.int32)
+            scores = np.zeros((n, self.k), dtype=np.float16)
+            for start in range(0, n, self.block_size):
+                stop = min(start + self.block_size, n)
+                block = self._similarity(text_vectors, skill_vectors, skill_sizes, slice(start, stop), slice(0, n))
+                block[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # bỏ chính nó
+                neighbors[start:stop], scores[start:stop] = self._top_k(block, np.arange(n))
+
+            self.vectorizer = vectorizer
+            self._state = _IndexState(text_vectors, skill_vectors, skill_sizes, neighbors, scores,
+                                      courses, row_by_url, row_by_title)
+            self.build_seconds = round(time.perf_counter() - t0, 3)
+        print(f"Built similar-course index: {n} courses, k={self.k} in {self.build_seconds:.2f}s")
+        return self
+
+    def add_courses(self, df: pd.DataFrame) -> int:
+        """
+        Refresh incremental cho khóa học mới (bỏ qua course_url/title đã có):
+        - dòng mới: top-k trên toàn bộ catalogue (cũ + mới)
+        - dòng cũ: trộn top-k hiện tại với các khóa học mới
+        Vocabulary/IDF của TF-IDF giữ nguyên; term mới chỉ có tác dụng sau khi build lại.
+        Kết quả được dựng trên bản sao rồi thay snapshot một lần: query đang chạy
+        không bao giờ thấy dòng trộn dở.
+
+        Returns:
+            Số khóa học đã thêm
+        """
+        with self._write_lock:
+            state = self._state
+            urls = df['course_url'].fillna('').astype(str).str.strip().str.rstrip('/')
+            titles = df['title'].fillna('').astype(str).str.strip().str.casefold()
+            known = urls.isin(state.row_by_url) | titles.isin(state.row_by_title)
+            df = df[~known].drop_duplicates(subset=['title'])
+            if df.empty:
+                return 0
+
+            t0 = time.perf_counter()
+            n_old, m = len(state.courses), len(df)
+            text_vectors = sparse.vstack([
+                state.text_vectors,
+                self.vectorizer.transform(df['full_content'].fillna('').astype(str)),
+            ]).tocsr()
+            skill_vectors = sparse.vstack([state.skill_vectors, self._skill_matrix(df['extracted_skills'])]).tocsr()
+            skill_sizes = np.asarray(skill_vectors.sum(axis=1), dtype=np.float32).ravel()
+
+            n = n_old + m
+            new_columns = np.arange(n_old, n)
+            neighbors = np.vstack([state.neighbors, np.full((m, self.k), -1, dtype=np.int32)])
+            scores = np.vstack([state.scores, np.zeros((m, self.k), dtype=np.float16)])
+            # Dòng cũ: chỉ cần so với m khóa học mới rồi trộn với top-k đang có
+            for start in range(0, n_old, self.block_size):
+                stop = min(start + self.block_size, n_old)
+                candidates = self._similarity(text_vectors, skill_vectors, skill_sizes,
+                                              slice(start, stop), slice(n_old, n))
+                old_scores = scores[start:stop].astype(np.float32)
+                old_scores[neighbors[start:stop] < 0] = -np.inf
+                merged = np.hstack([old_scores, candidates])
+                columns = np.hstack([neighbors[start:stop], np.broadcast_to(new_columns, candidates.shape)])
+                neighbors[start:stop], scores[start:stop] = self._top_k(merged, columns)
+
+            # Dòng mới: so với toàn bộ catalogue
+            for start in range(n_old, n, self.block_size):
+                stop = min(start + self.block_size, n)
+                block = self._similarity(text_vectors, skill_vectors, skill_sizes, slice(start, stop), slice(0, n))
+                block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+                neighbors[start:stop], scores[start:stop] = self._top_k(block, np.arange(n))
+
+            courses, row_by_url, row_by_title = self._register(
+                df, list(state.courses), dict(state.row_by_url), dict(state.row_by_title))
+            self._state = _IndexState(text_vectors, skill_vectors, skill_sizes, neighbors, scores,
+                                      courses, row_by_url, row_by_title)
+
+        print(f"Added {m} courses to similar-course index in {time.perf_counter() - t0:.2f}s")
+        return m
+
+    @staticmethod
+    def _register(df: pd.DataFrame, courses: List[Dict[str, Any]], row_by_url: Dict[str, int],
+                  row_by_title: Dict[str, int]):
+        for row in df.to_dict('records'):
+            position = len(courses)
+            courses.append(course_payload(row))
+            url = row.get('course_url')
+            if isinstance(url, str) and url:
+                row_by_url.setdefault(url.strip().rstrip('/'), position)
+            title = str(row.get('title', '')).strip().casefold()
+            if title:
+                row_by_title.setdefault(title, position)
+        return courses, row_by_url, row_by_title
+
+    def _skill_matrix(self, skills: pd.Series) -> sparse.csr_matrix:
+        rows, cols = [], []
+        for row, course_skills in enumerate(skills):
+            for skill in set(course_skills):
+                if skill in self._skill_column:
+                    rows.append(row)
+                    cols.append(self._skill_column[skill])
+        data = np.ones(len(rows), dtype=np.float32)
+        return sparse.csr_matrix((data, (rows, cols)), shape=(len(skills), len(self.skill_vocabulary)))
+
+    def _similarity(self, text_vectors, skill_vectors, skill_sizes: np.ndarray,
+                    rows: slice, columns: slice) -> np.ndarray:
+        """Block similarity dày (len(rows) x len(columns)), float32"""
+        text = (text_vectors[rows] @ text_vectors[columns].T).toarray()
+        overlap = (skill_vectors[rows] @ skill_vectors[columns].T).toarray()
+        union = skill_sizes[rows][:, None] + skill_sizes[columns][None, :] - overlap
+        jaccard = np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+        return self.text_weight * text + (1 - self.text_weight) * jaccard
+
+    def _top_k(self, block: np.ndarray, columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k theo dòng, sắp xếp giảm dần; thiếu ứng viên -> index -1"""
+        k = min(self.k, block.shape[1])
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        top_columns = np.take_along_axis(np.broadcast_to(columns, block.shape), top, axis=1)
+
+        neighbors = np.full((block.shape[0], self.k), -1, dtype=np.int32)
+        scores = np.zeros((block.shape[0], self.k), dtype=np.float16)
+        valid = np.isfinite(top_scores)
+        neighbors[:, :k] = np.where(valid, top_columns, -1)
+        scores[:, :k] = np.where(valid, top_scores, 0)
+        return neighbors, scores
+
+    # ---------- query ----------
+
+    def lookup(self, course_url: Optional[str] = None, title: Optional[str] = None,
+               k: int = 10) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """(khóa học, top-k tương tự) đọc từ cùng một snapshot; None nếu không tìm thấy"""
+        state = self._state
+        position = self._find(state, course_url, title)
+        if position is None:
+            return None
+        return state.courses[position], self._similar(state, position, k)
+
+    def find(self, course_url: Optional[str] = None, title: Optional[str] = None) -> Optional[int]:
+        """Dòng của khóa học theo course_url (ưu tiên) hoặc title (không phân biệt hoa thường)"""
+        return self._find(self._state, course_url, title)
+
+    def similar(self, position: int, k: int = 10) -> List[Dict[str, Any]]:
+        """Top-k khóa học tương tự (O(k): đọc một dòng neighbors/scores)"""
+        return self._similar(self._state, position, k)
+
+    def course(self, position: int) -> Dict[str, Any]:
+        return self._state.courses[position]
+
+    @staticmethod
+    def _find(state: _IndexState, course_url: Optional[str], title: Optional[str]) -> Optional[int]:
+        if course_url:
+            position = state.row_by_url.get(course_url.strip().rstrip('/'))
+            if position is not None:
+                return position
+        if title:
+            return state.row_by_title.get(title.strip().casefold())
+        return None
+
+    @staticmethod
+    def _similar(state: _IndexState, position: int, k: int) -> List[Dict[str, Any]]:
+        results = []
+        for neighbor, score in zip(state.neighbors[position, :k], state.scores[position, :k]):
+            if neighbor < 0 or score <= 0:
+                break
+            results.append({**state.courses[neighbor], 'similarity': round(float(score), 4)})
+        return results
@@ -0,0 +1,130 @@
+"""
+Startup Report - Đo chi phí cold start của backend theo từng module
+Chạy `python -X importtime` trong process con (cold, không cache trong process),
+tổng hợp thời gian import theo module top-level và thời gian load model.pkl.
+
+Usage:
+    python startup_report.py                      # in bảng báo cáo
+    python startup_report.py --budget-ms 1500     # exit 1 nếu import main vượt budget
+    python startup_report.py --include-model --json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+# Script chạy trong process con: import main, sau đó (tùy chọn) load model
+_CHILD_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - t0
+load_timings = {}
+if %(include_model)r:
+    import ml_model
+    t0 = time.perf_counter()
+    ml_model.model.load()
+    load_timings = dict(ml_model.model.load_timings)
+    load_timings['total'] = time.perf_counter() - t0
+sys.stdout.write('\\n' + json.dumps({'import_main': import_seconds, 'load': load_timings}))
+"""
+
+
+def parse_importtime(stderr: str, parent: str = "main") -> Tuple[Tuple, List[Tuple[str, float, float]]]:
+    """
+    Parse output của -X importtime.
+
+    importtime in module con trước module cha, nên các dòng indent 1 bậc
+    ngay phía trên dòng top-level `parent` là import trực tiếp của nó.
+
+    Returns:
+        (parent_row, children) với mỗi row là (module, self_ms, cumulative_ms)
+    """
+    parent_row, children, pending = None, [], []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        row = (name, int(self_us) / 1000, int(cumulative_us) / 1000)
+        level = (len(indent) - 1) // 2
+        if level == 0:
+            if name == parent:
+                parent_row, children = row, pending
+            pending = []
+        elif level == 1:
+            pending.append(row)
+    return parent_row, children
+
+
+def run_report(include_model: bool = False) -> Dict:
+    env = dict(os.environ, WARMUP_MODEL="0")
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_SCRIPT % {"include_model": include_model}],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import main thất bại:\n{proc.stderr[-2000:]}")
+
+    child = json.loads(proc.stdout.strip().splitlines()[-1])
+    main_row, modules = parse_importtime(proc.stderr, parent="main")
+    modules.sort(key=lambda r: r[2], reverse=True)
+    return {
+        "process_wall_ms": wall * 1000,
+        "import_main_ms": child["import_main"] * 1000,
+        "main_self_ms": main_row[1] if main_row else None,
+        "modules": [{"module": m, "self_ms": s, "cumulative_ms": c} for m, s, c in modules],
+        "model_load_ms": {k: v * 1000 for k, v in child["load"].items()},
+    }
+
+
+def print_report(report: Dict, top: int = 15):
+    print("=" * 64)
+    print("🚀 COLD START REPORT")
+    print("=" * 64)
+    print(f"  Process wall time : {report['process_wall_ms']:9.1f} ms")
+    print(f"  import main       : {report['import_main_ms']:9.1f} ms")
+    print("-" * 64)
+    print(f"  {'module (import trực tiếp của main)':<36}{'self ms':>12}{'cumul ms':>12}")
+    for row in report["modules"][:top]:
+        print(f"  {row['module']:<36}{row['self_ms']:>12.1f}{row['cumulative_ms']:>12.1f}")
+    if report["model_load_ms"]:
+        print("-" * 64)
+        print("  Model load:")
+        for name, ms in report["model_load_ms"].items():
+            print(f"  {name:<36}{'':>12}{ms:>12.1f}")
+    print("=" * 64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Báo cáo chi phí cold start của backend")
+    parser.add_argument("--include-model", action="store_true", help="Đo thêm thời gian load model.pkl")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Budget cho import main (ms)")
+    parser.add_argument("--json", action="store_true", help="In báo cáo dạng JSON")
+    args = parser.parse_args()
+
+    report = run_report(include_model=args.include_model)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.budget_ms is not None and report["import_main_ms"] > args.budget_ms:
+        print(f"✗ import main {report['import_main_ms']:.1f} ms vượt budget {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Module của backend import theo tên (chạy từ thư mục backend/), như uvicorn main:app
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def test_database(tmp_path_factory):
+    """
+    database.engine trỏ tới SQLite tạm: URL ./udemy_predictions.db được resolve theo
+    thư mục lúc import, test không được tạo/ghi database thật
+    """
+    from sqlalchemy import create_engine
+
+    import database
+
+    database.engine = create_engine(
+        f"sqlite:///{tmp_path_factory.mktemp('db') / 'udemy_predictions.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    database.SessionLocal.configure(bind=database.engine)
+    return database.engine
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    TestClient của main.app, chạy từ thư mục backend như `uvicorn main:app`
+    (model.pkl, data CSV theo đường dẫn tương đối). Không chạy startup hook.
+    """
+    monkeypatch.setenv("WARMUP_MODEL", "0")
+    monkeypatch.setenv("WARMUP_RECOMMENDER", "0")
+    monkeypatch.chdir(BACKEND_DIR)
+    from fastapi.testclient import TestClient
+
+    import main
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def session_factory(client, tmp_path):
+    """Database SQLite tạm thay cho udemy_predictions.db (override get_db của main)"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import main
+    import models
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'predictions.db'}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_test_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[main.get_db] = get_test_db
+    return factory
+
+
+@pytest.fixture
+def make_catalogue():
+    return _make_catalogue
+
+
+def _make_catalogue(groups):
+    """
+    Catalogue nhỏ trong bộ nhớ (cùng cột với load_prepared_catalogue).
+    groups: [(language, category, số khóa học)]; language có thể là None (NaN)
+    """
+    subjects = ["Python", "JavaScript", "SQL", "Machine Learning", "Docker", "React"]
+    levels = ["for Beginners", "Fundamentals", "Advanced Masterclass"]
+    rows = []
+    for language, category, count in groups:
+        for i in range(count):
+            subject, level = subjects[i % len(subjects)], levels[(i // len(subjects)) % len(levels)]
+            title = f"{subject} {level} {language or 'unknown'} {category} {i}"
+            rows.append({
+                "course_url": f"https://www.udemy.com/course/{title.lower().replace(' ', '-')}/",
+                "title": title,
+                "headline": f"Learn {subject} {level.lower()} with projects",
+                "is_bestseller": "Yes" if i % 4 == 0 else "No",
+                "rating": 4.0 + (i % 5) / 10,
+                "num_students": float(1000 * (i + 1)),
+                "instructor": "Instructor",
+                "language": language,
+                "price": 199000.0,
+                "related_topics": f"{subject}, {category}",
+                "sections": 10.0,
+                "lectures": 50.0,
+                "total_length": "5h 30m",
+                "duration_minutes": 120 + 300 * (i % 5),
+                "category": category,
+            })
+    return pd.DataFrame(rows)
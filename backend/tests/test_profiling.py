@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+
+import profiling
+
+TOKEN = "test-token"
+PROFILE_HEADERS = {"X-Profile": "1", "X-Profile-Token": TOKEN}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKENS", {TOKEN})
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path / "profiles")
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL", 0.001)
+
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    @app.get("/work/")
+    async def work(seconds: float = 0.05):
+        await asyncio.sleep(seconds)
+        return {"ok": True}
+
+    @app.get("/cpu/")
+    async def cpu():
+        return {"total": await run_in_threadpool(busy_loop, 0.1)}
+
+    return app
+
+
+def busy_loop(seconds: float) -> int:
+    total, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def request(app, *calls):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get(path, headers=headers) for path, headers in calls))
+    return asyncio.run(run())
+
+
+def test_unprofiled_request_passes_through(app):
+    (response,) = request(app, ("/work/?seconds=0", {}))
+    assert response.json() == {"ok": True}
+    assert profiling.PROFILE_ID_HEADER not in response.headers
+    assert not profiling.PROFILE_DIR.exists()
+
+
+def test_profiled_request_is_saved_and_tagged_with_overlap(app):
+    profiled, _, _ = request(
+        app,
+        ("/work/?seconds=0.1", PROFILE_HEADERS),
+        ("/work/?seconds=0.02", {}),
+        ("/work/?seconds=0.02", {}),
+    )
+    assert profiled.json() == {"ok": True}
+    assert profiled.headers[profiling.PROFILE_OVERLAP_HEADER] == "2"
+
+    path = profiling.find_profile(profiled.headers[profiling.PROFILE_ID_HEADER])
+    assert path is not None
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines
+    assert all(" (event loop, shared, 2 overlapping requests);" in line for line in lines)
+
+
+def test_profile_includes_threadpool_work(app):
+    (profiled,) = request(app, ("/cpu/", PROFILE_HEADERS))
+    assert profiled.json()["total"] > 0
+
+    path = profiling.find_profile(profiled.headers[profiling.PROFILE_ID_HEADER])
+    lines = path.read_text(encoding="utf-8").splitlines()
+    worker = [line for line in lines if ";busy_loop (test_profiling.py:" in line]
+    assert worker
+    # Frame gốc là tên worker thread, không phải event loop
+    assert all("event loop" not in line.split(";", 1)[0] for line in worker)
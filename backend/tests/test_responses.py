@@ -0,0 +1,165 @@
+import gzip
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+import responses
+from responses import CompressionMiddleware, negotiate_encoding
+
+BIG = {"rows": [{"id": i, "title": f"course {i}"} for i in range(200)]}
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    """negotiate_encoding chỉ cần biết brotli có được cài hay không"""
+    monkeypatch.setattr(responses, "brotli", object())
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, deflate, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0.5, br;q=0.1", "br"),
+    ("*", "br"),
+    ("*;q=0", None),
+    ("gzip;q=0, *", "br"),
+    ("identity", None),
+    ("", None),
+    ("gzip;q=abc", None),
+])
+def test_negotiate_with_brotli(with_brotli, accept, expected):
+    assert negotiate_encoding(accept) == expected
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, deflate, br", "gzip"),
+    ("br", None),
+    ("*", "gzip"),
+    ("br, *;q=0", None),
+    ("GZIP;q=1.0", "gzip"),
+])
+def test_negotiate_without_brotli(without_brotli, accept, expected):
+    assert negotiate_encoding(accept) == expected
+
+
+@pytest.fixture
+def compressed(without_brotli):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/big/")
+    async def big():
+        return BIG
+
+    @app.get("/small/")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/encoded/")
+    async def encoded():
+        body = gzip.compress(b"x" * 4096)
+        return Response(body, media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream/")
+    async def stream():
+        return StreamingResponse((f"line {i}\n" * 50 for i in range(20)), media_type="text/csv")
+
+    return TestClient(app)
+
+
+def get_raw(client, path, accept):
+    """Response không giải nén (để đo số byte trên đường truyền)"""
+    with client.stream("GET", path, headers={"accept-encoding": accept}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_large_response_is_gzipped_with_vary(compressed):
+    response, raw = get_raw(compressed, "/big/", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    assert gzip.decompress(raw) == compressed.get("/big/", headers={"accept-encoding": "identity"}).content
+
+
+def test_identity_and_small_responses_are_not_compressed(compressed):
+    response, raw = get_raw(compressed, "/big/", "identity")
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(raw)
+
+    response, raw = get_raw(compressed, "/small/", "gzip")
+    assert "content-encoding" not in response.headers
+    assert raw == b'{"ok":true}'
+
+
+def test_minimum_size_threshold(without_brotli):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=len(b'{"ok":true}'))
+
+    @app.get("/small/")
+    async def small():
+        return {"ok": True}
+
+    response, _ = get_raw(TestClient(app), "/small/", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+
+
+def test_already_encoded_response_passes_through(compressed):
+    response, raw = get_raw(compressed, "/encoded/", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw) == b"x" * 4096
+
+
+def test_streaming_response_is_compressed_chunk_by_chunk(compressed):
+    response, raw = get_raw(compressed, "/stream/", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw) == "".join(f"line {i}\n" * 50 for i in range(20)).encode()
+
+
+def test_brotli_when_installed(monkeypatch):
+    brotli = pytest.importorskip("brotli")
+    monkeypatch.setattr(responses, "brotli", brotli)
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/big/")
+    async def big():
+        return BIG
+
+    response, raw = get_raw(TestClient(app), "/big/", "br, gzip")
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(raw) == TestClient(app).get("/big/", headers={"accept-encoding": "identity"}).content
+
+
+def test_predictions_export_streams_gzip_csv(without_brotli, client, monkeypatch):
+    import main
+    import models
+
+    # /predictions/export/ đọc qua engine của main (database tạm của test)
+    with main.SessionLocal() as db:
+        db.query(models.UdemyPrediction).delete()
+        db.add_all([
+            models.UdemyPrediction(
+                rating=4.5, discount=0.1, num_reviews=i, num_students=100, price=199000.0,
+                total_length_minutes=120, sections=5, lectures=20,
+                prediction="Bestseller", probability=0.8, created_at=datetime(2026, 1, 1, 12, i % 60),
+            )
+            for i in range(300)
+        ])
+        db.commit()
+    monkeypatch.setattr(main.retention, "iter_archive_frames", lambda *args, **kwargs: iter(()))
+
+    response, raw = get_raw(client, "/predictions/export/", "gzip")
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert lines[0].startswith("id,rating,discount")
+    assert len(lines) == 301
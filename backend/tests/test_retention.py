@@ -0,0 +1,111 @@
+import shutil
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip("pyarrow")
+
+import models
+import retention
+
+NOW = datetime(2026, 10, 1)
+
+
+def add_predictions(engine, offset=timedelta(0)):
+    with sessionmaker(bind=engine)() as db:
+        # 4 ngày x 96 dòng (mỗi 15 phút), cũ nhất trước
+        db.add_all([
+            models.UdemyPrediction(
+                rating=4.5, discount=0.1, num_reviews=10, num_students=100, price=199000.0,
+                total_length_minutes=120, sections=5, lectures=20,
+                prediction="Bestseller", probability=0.8,
+                created_at=NOW - timedelta(days=10) - timedelta(minutes=15 * (384 - i)) + offset,
+            )
+            for i in range(384)
+        ])
+        db.commit()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'predictions.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    add_predictions(engine)
+    return engine
+
+
+def test_archive_compacts_to_one_file_per_day(engine, tmp_path):
+    archive_dir = tmp_path / "archive"
+    stats = retention.archive_old_predictions(engine, 5, archive_dir, batch_size=50, now=NOW)
+
+    assert stats["archived_rows"] == 384
+    assert stats["files"] > stats["batches"]  # batch cắt ngang ranh giới ngày
+    partitions = list(archive_dir.glob("created_date=*"))
+    assert all(len(list(p.glob("*.parquet"))) == 1 for p in partitions)
+    assert retention.archive_stats(archive_dir)["files"] == len(partitions)
+
+    archived = retention.read_archive(archive_dir)
+    assert len(archived) == 384
+    assert archived['id'].is_unique
+
+
+def test_compact_drops_rows_left_by_interrupted_run(engine, tmp_path):
+    archive_dir = tmp_path / "archive"
+    retention.archive_old_predictions(engine, 5, archive_dir, batch_size=50, now=NOW)
+    part = next(archive_dir.glob("created_date=*/part-*.parquet"))
+    shutil.copy(part, part.parent / "part-000000000000-000000000000.parquet")
+
+    assert retention.compact_partitions(archive_dir) == 1
+    assert len(retention.read_archive(archive_dir)) == 384
+
+
+def test_compact_keeps_distinct_rows_with_reused_ids(engine, tmp_path):
+    archive_dir = tmp_path / "archive"
+    retention.archive_old_predictions(engine, 5, archive_dir, batch_size=50, now=NOW)
+    # Bảng rỗng -> SQLite cấp lại id từ 1 cho dòng mới, cùng các ngày đã archive
+    add_predictions(engine, offset=timedelta(minutes=5))
+    retention.archive_old_predictions(engine, 5, archive_dir, batch_size=50, now=NOW)
+
+    archived = retention.read_archive(archive_dir)
+    assert len(archived) == 768
+    assert archived['id'].nunique() == 384
+    assert all(len(list(p.glob("*.parquet"))) == 1 for p in archive_dir.glob("created_date=*"))
+
+
+def test_archived_row_count_follows_files_written_elsewhere(engine, tmp_path):
+    archive_dir = tmp_path / "archive"
+    assert retention.archived_row_count(archive_dir) == 0
+
+    # Như một process khác (CLI) archive/compact: cache không được giữ số cũ
+    retention.archive_old_predictions(engine, 12, archive_dir, batch_size=50, now=NOW)
+    first = retention.archived_row_count(archive_dir)
+    assert 0 < first < 384
+    retention.archive_old_predictions(engine, 5, archive_dir, batch_size=50, now=NOW)
+    assert retention.archived_row_count(archive_dir) == 384
+
+    part = next(archive_dir.glob("created_date=*/part-*.parquet"))
+    part.unlink()
+    assert retention.archived_row_count(archive_dir) == retention.archive_stats(archive_dir)["rows"] < 384
+
+
+def test_archive_skips_while_another_worker_holds_the_lock(engine, tmp_path):
+    archive_dir = tmp_path / "archive"
+    with retention.archive_lock(archive_dir) as acquired:
+        assert acquired
+        stats = retention.archive_old_predictions(engine, 5, archive_dir, batch_size=50, now=NOW)
+    assert stats["skipped"]
+    assert retention.archived_row_count(archive_dir) == 0
+
+    stats = retention.archive_old_predictions(engine, 5, archive_dir, batch_size=50, now=NOW)
+    assert stats["archived_rows"] == 384
+
+
+def test_only_cli_path_converts_legacy_database_to_incremental_vacuum(engine, tmp_path):
+    assert not retention.incremental_vacuum_enabled(engine)
+    retention.archive_old_predictions(engine, 12, tmp_path / "archive", now=NOW, convert_database=False)
+    assert not retention.incremental_vacuum_enabled(engine)
+
+    retention.archive_old_predictions(engine, 5, tmp_path / "archive", now=NOW)
+    assert retention.incremental_vacuum_enabled(engine)
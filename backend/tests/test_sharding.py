@@ -0,0 +1,70 @@
+import pytest
+
+from sequential_mining import ShardedRecommender
+
+GROUPS = [
+    ("English", "Development", 30),
+    ("English", "Business", 12),
+    ("Spanish", "Development", 6),
+    (None, "Development", 12),  # language NaN
+]
+
+
+@pytest.fixture
+def sharded(make_catalogue):
+    return ShardedRecommender(shard_by=["language", "category"], min_courses=10, workers=1,
+                              df=make_catalogue(GROUPS), data_version="test-version")
+
+
+def test_prebuilt_keys_skip_small_and_missing_values(sharded):
+    assert set(sharded.shards) == {("english", "development"), ("english", "business")}
+    assert ("nan", "development") not in sharded._prebuilt_keys(10)
+    assert len(sharded.get("English", "Development").df) == 30
+
+
+def test_routing_normalizes_filters(sharded):
+    assert sharded.get() is sharded.global_recommender
+    assert sharded.get(language="", category="  ") is sharded.global_recommender
+    shard = sharded.get(language=" ENGLISH ", category="development")
+    assert shard is sharded.shards[("english", "development")]
+    assert shard.shard == "language=english|category=development"
+
+
+def test_small_shard_is_built_lazily_and_cached(sharded):
+    assert ("spanish", None) not in sharded.shards
+    shard = sharded.get(language="Spanish")
+    assert len(shard.df) == 6
+    assert sharded.get(language="spanish") is shard
+    assert ("spanish", None) in sharded.shards
+
+    # Chiều category riêng: gồm cả khóa học có language NaN
+    assert len(sharded.get(category="Development").df) == 30 + 6 + 12
+
+
+@pytest.mark.parametrize("language", ["Klingon", "nan"])
+def test_unknown_shard_is_empty_and_not_cached(sharded, language):
+    shard = sharded.get(language=language)
+    assert shard.df.empty
+    assert shard.shard == f"language={language.lower()}"
+    assert (language.lower(), None) not in sharded.shards
+    assert shard.get_full_recommendation("Python")["success"] is False
+
+
+def test_shard_by_single_dimension(make_catalogue):
+    sharded = ShardedRecommender(shard_by=["language"], min_courses=10, workers=1,
+                                 df=make_catalogue(GROUPS), data_version="test-version")
+    assert set(sharded.shards) == {("english", None)}
+    assert len(sharded.get(language="English").df) == 42
+
+
+def test_recommend_endpoint_routes_to_shard(client, sharded, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "get_sharded_recommender", lambda: sharded)
+    body = client.post("/recommend/", json={"target_topic": "Python", "language": "Klingon"}).json()
+    assert body["success"] is False
+    assert body["shard"] == "language=klingon"
+
+    body = client.post("/recommend/", json={"target_topic": "Python", "language": "English",
+                                            "category": "Development"}).json()
+    assert body["shard"] == "language=english|category=development"
@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+import profiling
+from sequential_mining import ALL_SKILLS, add_skill_columns
+from similar_courses import SimilarCourseIndex
+
+COURSES = [
+    ("Python for Data Science", "pandas numpy python data analysis", "Python, Data Science, Development"),
+    ("Python Data Analysis Bootcamp", "python pandas data analysis projects", "Python, Data Science, Development"),
+    ("Machine Learning with Python", "python scikit learn machine learning models", "Machine Learning, Data Science"),
+    ("Deep Learning with TensorFlow", "tensorflow keras deep learning neural networks", "Deep Learning, Data Science"),
+    ("JavaScript Web Development", "javascript html css web development", "JavaScript, Web Development"),
+    ("Modern JavaScript Web Apps", "javascript web development react apps", "JavaScript, Web Development"),
+]
+NEW_COURSES = [
+    ("Deep Learning Neural Networks in Keras", "keras tensorflow deep learning neural networks", "Deep Learning, Data Science"),
+    ("Python Pandas Data Analysis", "python pandas data analysis numpy", "Python, Data Science, Development"),
+]
+
+
+def catalogue(rows):
+    df = pd.DataFrame(rows, columns=["title", "headline", "related_topics"])
+    df["course_url"] = "https://www.udemy.com/course/" + df["title"].str.lower().str.replace(" ", "-") + "/"
+    return add_skill_columns(df)
+
+
+def titles(similar):
+    return [course["title"] for course in similar]
+
+
+@pytest.fixture
+def index():
+    return SimilarCourseIndex(ALL_SKILLS, k=3, block_size=4).build(catalogue(COURSES))
+
+
+def test_build_keeps_top_k_per_course(index):
+    assert len(index) == len(COURSES)
+    assert index.neighbors.shape == (len(COURSES), 3)
+    assert index.neighbors.dtype.name == "int32"
+    assert index.scores.dtype.name == "float16"
+
+    for position in range(len(index)):
+        neighbors = index.neighbors[position]
+        assert position not in neighbors
+        scores = index.scores[position].astype(float)
+        assert list(scores) == sorted(scores, reverse=True)
+
+    similar = index.similar(index.find(title="JavaScript Web Development"), k=1)
+    assert titles(similar) == ["Modern JavaScript Web Apps"]
+
+
+def test_lookup_by_url_and_by_title(index):
+    url = "https://www.udemy.com/course/python-for-data-science"
+    by_url = index.lookup(course_url=url + "/", k=2)
+    by_title = index.lookup(title="  python FOR data science ", k=2)
+    assert by_url is not None and by_title is not None
+    assert by_url[0]["title"] == by_title[0]["title"] == "Python for Data Science"
+    assert titles(by_url[1]) == titles(by_title[1])
+    assert titles(by_url[1])[0] == "Python Data Analysis Bootcamp"
+    assert all(course["similarity"] > 0 for course in by_url[1])
+
+    assert index.lookup(title="Klingon for Beginners") is None
+    assert index.lookup(course_url="https://www.udemy.com/course/missing/") is None
+
+
+def test_add_courses_links_new_rows_and_updates_existing(index):
+    before = titles(index.lookup(title="Deep Learning with TensorFlow", k=3)[1])
+    assert "Deep Learning Neural Networks in Keras" not in before
+
+    added = index.add_courses(catalogue(COURSES + NEW_COURSES))
+    assert added == len(NEW_COURSES)
+    assert len(index) == len(COURSES) + len(NEW_COURSES)
+    assert index.add_courses(catalogue(NEW_COURSES)) == 0
+
+    # Dòng mới có neighbors trên toàn bộ catalogue
+    _, similar = index.lookup(title="Python Pandas Data Analysis", k=3)
+    assert similar and "Python for Data Science" in titles(similar)
+    # Dòng cũ được trộn với khóa học mới
+    _, similar = index.lookup(title="Deep Learning with TensorFlow", k=1)
+    assert titles(similar) == ["Deep Learning Neural Networks in Keras"]
+
+
+class _FakeSharded:
+    def __init__(self, index):
+        self.similar_index = index
+        self.refreshed = 0
+
+    def refresh_similar_courses(self):
+        self.refreshed += 1
+        return 0
+
+
+@pytest.fixture
+def sharded(client, index, monkeypatch):
+    import main
+
+    fake = _FakeSharded(index)
+    monkeypatch.setattr(main, "get_sharded_recommender", lambda: fake)
+    monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKENS", {"admin-token"})
+    return fake
+
+
+def test_similar_endpoint_and_not_found(client, sharded):
+    response = client.get("/similar/", params={"title": "Python for Data Science", "k": 2})
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+
+    assert client.get("/similar/", params={"title": "Klingon for Beginners"}).status_code == 404
+    assert client.get("/similar/").status_code == 400
+
+
+def test_refresh_requires_admin_token(client, sharded):
+    assert client.post("/similar/refresh/").status_code == 403
+    assert client.post("/similar/refresh/", headers={"X-Profile-Token": "wrong"}).status_code == 403
+    assert sharded.refreshed == 0
+
+    response = client.post("/similar/refresh/", headers={"X-Profile-Token": "admin-token"})
+    assert response.status_code == 200
+    assert response.json() == {"added": 0, "total_courses": len(COURSES)}
+    assert sharded.refreshed == 1
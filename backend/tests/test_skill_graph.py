@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import networkx as nx
+import pytest
+
+from sequential_mining import (
+    SequentialMiningRecommender,
+    extract_skills_from_text,
+    prerequisite_order,
+    widest_prerequisite_path,
+)
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "data_final_fix.csv"
+
+
+def assert_single_ordering(paths):
+    """Mọi path phải thuận theo cùng một thứ tự: hợp các cạnh liên tiếp không có chu trình"""
+    served = nx.DiGraph()
+    for path in paths:
+        assert len(set(path)) == len(path)
+        served.add_edges_from(zip(path, path[1:]))
+    assert nx.is_directed_acyclic_graph(served)
+
+
+def test_extract_skills_matches_word_boundaries():
+    skills = extract_skills_from_text("Email marketing with JavaScript, then AI and Python")
+    assert 'javascript' in skills
+    assert 'java' not in skills
+    assert 'ai' in skills
+    assert 'python' in skills
+    assert extract_skills_from_text("Detailed email campaigns") == []
+
+
+def test_prerequisite_order_drops_weakest_edge_of_cycle():
+    edges = {('python', 'java'): 10, ('java', 'ai'): 8, ('ai', 'python'): 3}
+    order = prerequisite_order(edges)
+    rank = {skill: i for i, skill in enumerate(order)}
+    assert rank['python'] < rank['java'] < rank['ai']
+
+
+def test_widest_path_starts_at_root_and_prefers_shorter_on_tie():
+    graph = nx.DiGraph()
+    graph.add_edge('python', 'pandas', support=5)
+    graph.add_edge('pandas', 'machine learning', support=5)
+    graph.add_edge('python', 'machine learning', support=5)
+    assert widest_prerequisite_path(graph, 'machine learning') == ['python', 'machine learning']
+
+    graph['python']['machine learning']['support'] = 2
+    assert widest_prerequisite_path(graph, 'machine learning') == ['python', 'pandas', 'machine learning']
+    assert widest_prerequisite_path(graph, 'python') == ['python']
+
+
+@pytest.mark.skipif(not DATA_PATH.exists(), reason="thiếu data_final_fix.csv")
+def test_served_paths_respect_single_ordering():
+    recommender = SequentialMiningRecommender(str(DATA_PATH))
+    assert nx.is_directed_acyclic_graph(recommender.skill_graph)
+    assert_single_ordering(recommender.skill_paths.values())
+
+    rank = {skill: i for i, skill in enumerate(recommender.skill_order)}
+    for path in recommender.skill_paths.values():
+        assert [rank[skill] for skill in path] == sorted(rank[skill] for skill in path)
+
+    served = []
+    for goal in list(recommender.skill_paths) + ['Machine Learning', 'AI Engineer', 'React JS', 'Data Scientist']:
+        result = recommender.get_full_recommendation(goal)
+        if result.get('path_type') == 'skill_graph':
+            served.append(result['path'])
+    assert served
+    assert_single_ordering(served)
@@ -0,0 +1,65 @@
+import pytest
+
+from schemas import SWEEP_MAX_SCENARIOS
+
+BASE = {
+    "rating": 4.5, "discount": 0.75, "num_reviews": 1500, "num_students": 50000,
+    "price": 199000.0, "total_length_minutes": 600, "sections": 10, "lectures": 80,
+}
+
+
+def sweep(client, axes, **params):
+    return client.post("/predict/sweep/", json={"base": BASE, "axes": axes}, params=params)
+
+
+def test_sweep_grid_shape_follows_axis_order(client):
+    response = sweep(client, {
+        "price": {"values": [99000, 199000, 299000]},
+        "discount": {"start": 0.0, "stop": 0.9, "num": 4},
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert [axis["field"] for axis in body["axes"]] == ["price", "discount"]
+    assert body["shape"] == [3, 4]
+    assert body["scenarios"] == 12
+    assert len(body["probabilities"]) == 3
+    assert all(len(row) == 4 for row in body["probabilities"])
+    assert all(0.0 <= p <= 1.0 for row in body["probabilities"] for p in row)
+
+
+def test_sweep_matches_predict_for_base_point(client, session_factory):
+    single = client.post("/predict/", json=BASE).json()
+    bestseller = single["probability"] if single["prediction"] == "Bestseller" else 1 - single["probability"]
+    body = sweep(client, {"price": {"values": [BASE["price"]]}}).json()
+    assert body["probabilities"][0] == pytest.approx(bestseller, abs=1e-4)
+
+
+def test_sweep_rejects_grid_over_scenario_cap(client):
+    side = 200
+    assert side ** 3 > SWEEP_MAX_SCENARIOS
+    axis = {"start": 1, "stop": 200, "num": side}
+    response = sweep(client, {"sections": axis, "lectures": axis, "num_reviews": axis})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("axes", [
+    {"rating": {"values": [4.0, 5.5]}},              # le=5
+    {"discount": {"start": -0.1, "stop": 0.5}},       # ge=0
+    {"sections": {"values": [0, 1]}},                 # gt=0
+])
+def test_sweep_rejects_values_out_of_bounds(client, axes):
+    assert sweep(client, axes).status_code == 422
+
+
+def test_sweep_rejects_fractional_values_on_int_fields(client):
+    # /predict/ từ chối sections=0.4; sweep không được làm tròn thành sections=0
+    assert sweep(client, {"sections": {"values": [0.4, 1]}}).status_code == 422
+    assert sweep(client, {"lectures": {"values": [10, 20.5]}}).status_code == 422
+
+
+def test_sweep_rounds_int_ranges_and_checks_bounds_after_rounding(client):
+    body = sweep(client, {"lectures": {"start": 10, "stop": 20, "num": 4}}).json()
+    assert body["axes"][0]["values"] == [10.0, 13.0, 17.0, 20.0]
+
+    # 0.4 làm tròn thành 0, vi phạm sections > 0
+    assert sweep(client, {"sections": {"start": 0.4, "stop": 5, "num": 3}}).status_code == 422
@@ -0,0 +1,46 @@
+import pytest
+
+from sequential_mining import SequentialMiningRecommender
+
+
+@pytest.fixture
+def recommenders(make_catalogue):
+    df = make_catalogue([("English", "Development", 30)])
+    return {
+        version: SequentialMiningRecommender(df=df, data_version=version)
+        for version in ("0123456789abcdef-v1", "fedcba9876543210-v2")
+    }
+
+
+@pytest.fixture
+def serve(client, monkeypatch):
+    import main
+
+    def use(recommender):
+        monkeypatch.setattr(main, "get_recommender", lambda: recommender)
+    return use
+
+
+def test_topics_etag_and_conditional_get(client, serve, recommenders):
+    old, new = recommenders.values()
+    serve(old)
+
+    response = client.get("/topics/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag == old.topic_catalogue_etag
+    assert response.headers["cache-control"] == "public, max-age=300, must-revalidate"
+    assert response.json()["count"] == len(response.json()["topics"]) > 0
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        cached = client.get("/topics/", headers={"If-None-Match": if_none_match})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+    assert client.get("/topics/", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    # Catalogue đổi version -> ETag mới, ETag cũ không còn 304
+    serve(new)
+    response = client.get("/topics/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == new.topic_catalogue_etag != etag
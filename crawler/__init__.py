@@ -0,0 +1,29 @@
+"""
+Udemy Crawler - Crawl song song, có checkpoint/resume (tách từ Crawling.ipynb)
+
+    python -m crawler --pages 1-417 --workers 4 --out udemy_courses.csv
+"""
+
+from .fetchers import HostRateLimiter, HttpFetcher, SeleniumFetcher
+from .parsers import (
+    FIELDNAMES,
+    extract_curriculum_stats,
+    extract_discount,
+    extract_num_reviews,
+    extract_num_students,
+    extract_price,
+    extract_rating_number,
+    parse_course_page,
+    parse_search_page,
+)
+from .pipeline import DEFAULT_SEARCH_URL, crawl, parse_saved_html
+from .storage import Checkpoint, CsvSink
+
+__all__ = [
+    'HostRateLimiter', 'HttpFetcher', 'SeleniumFetcher',
+    'FIELDNAMES', 'extract_curriculum_stats', 'extract_discount', 'extract_num_reviews',
+    'extract_num_students', 'extract_price', 'extract_rating_number',
+    'parse_course_page', 'parse_search_page',
+    'DEFAULT_SEARCH_URL', 'crawl', 'parse_saved_html',
+    'Checkpoint', 'CsvSink',
+]
@@ -0,0 +1,77 @@
+"""
+CLI cho crawler
+
+Usage:
+    # Crawl Udemy thật (Chrome headless, 4 worker, tối thiểu 2s giữa 2 request cùng host)
+    python -m crawler --pages 1-417 --workers 4 --out udemy_courses_machine_learning.csv
+
+    # Chạy lại sau khi lỗi: cùng lệnh, checkpoint tự bỏ qua phần đã xong
+    # Offline với server fixture local (không JavaScript): HTML trong crawler/tests/fixtures
+    python -m crawler.tests.fixture_server --port 8765 &
+    python -m crawler --fetcher http --search-url "http://127.0.0.1:8765/search?p={page}" --pages 1-3 \
+        --min-interval 0 --jitter 0
+
+    # Chạy lại parser trên HTML đã lưu bằng --save-html
+    python -m crawler --parse-html html_pages/ --out reparsed.csv
+"""
+
+import argparse
+
+from .fetchers import HostRateLimiter, HttpFetcher, SeleniumFetcher
+from .pipeline import DEFAULT_SEARCH_URL, crawl, parse_saved_html
+
+
+def parse_pages(spec: str):
+    """'1-417' / '5' / '1-10,20-30' -> list các số trang"""
+    pages = []
+    for part in spec.split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            pages.extend(range(int(start), int(end) + 1))
+        elif part.strip():
+            pages.append(int(part))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m crawler", description="Crawl khóa học Udemy")
+    parser.add_argument("--pages", default="1-417", help="Dải trang search, vd 1-417 hoặc 1-10,20")
+    parser.add_argument("--search-url", default=DEFAULT_SEARCH_URL, help="URL trang search, chứa {page}")
+    parser.add_argument("--out", default="udemy_courses_machine_learning.csv")
+    parser.add_argument("--checkpoint", default=None, help="Mặc định: <out>.checkpoint.jsonl")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--fetcher", choices=["selenium", "http"], default="selenium")
+    parser.add_argument("--min-interval", type=float, default=2.0, help="Giây tối thiểu giữa 2 request cùng host")
+    parser.add_argument("--jitter", type=float, default=1.0, help="Jitter ngẫu nhiên thêm vào (giây)")
+    parser.add_argument("--no-headless", action="store_true")
+    parser.add_argument("--save-html", default=None, help="Thư mục lưu HTML trang khóa học")
+    parser.add_argument("--parse-html", default=None, help="Chỉ parse HTML đã lưu trong thư mục này")
+    args = parser.parse_args()
+
+    if args.parse_html:
+        count = parse_saved_html(args.parse_html, args.out)
+        print(f"✅ Đã parse {count} trang HTML -> {args.out}")
+        return
+
+    limiter = HostRateLimiter(args.min_interval, args.jitter)
+    if args.fetcher == "http":
+        fetcher = HttpFetcher(limiter)
+    else:
+        fetcher = SeleniumFetcher(limiter, headless=not args.no_headless)
+
+    try:
+        crawl(
+            fetcher,
+            parse_pages(args.pages),
+            args.out,
+            args.checkpoint or f"{args.out}.checkpoint.jsonl",
+            search_url=args.search_url,
+            workers=args.workers,
+            save_html_dir=args.save_html,
+        )
+    finally:
+        fetcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Fetchers - Lấy HTML của một URL, tách biệt khỏi parsing
+- HttpFetcher:     urllib thuần (server fixture local, trang đã render sẵn)
+- SeleniumFetcher: undetected-chromedriver, mỗi worker thread một driver riêng
+Cả hai dùng chung HostRateLimiter để giới hạn tốc độ theo từng host.
+"""
+
+import random
+import threading
+import time
+import urllib.request
+from typing import Dict
+from urllib.parse import urlsplit
+
+
+class HostRateLimiter:
+    """
+    Giới hạn tốc độ theo host: hai request tới cùng host cách nhau ít nhất
+    `min_interval` giây (+ jitter ngẫu nhiên, thay cho random_sleep của notebook).
+    Request tới các host khác nhau không chặn nhau.
+    """
+
+    def __init__(self, min_interval: float = 2.0, jitter: float = 1.0):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval + random.uniform(0, self.jitter)
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class HttpFetcher:
+    """Fetch bằng urllib (không chạy JavaScript)"""
+
+    def __init__(self, rate_limiter: HostRateLimiter, timeout: float = 15.0,
+                 user_agent: str = "Mozilla/5.0 (compatible; udemy-crawler)"):
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.user_agent = user_agent
+
+    def fetch(self, url: str) -> str:
+        self.rate_limiter.wait(url)
+        request = urllib.request.Request(url, headers={"User-Agent": self.user_agent,
+                                                       "Accept-Language": "en-US"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            charset = response.headers.get_content_charset() or "utf-8"
+            return response.read().decode(charset, errors="replace")
+
+    def close(self):
+        pass
+
+
+class SeleniumFetcher:
+    """
+    Fetch bằng undetected-chromedriver (trang Udemy render bằng JavaScript).
+    Mỗi worker thread giữ một Chrome riêng; scroll có giới hạn số lần thay vì
+    scroll tới khi chiều cao trang không đổi.
+    """
+
+    def __init__(self, rate_limiter: HostRateLimiter, headless: bool = True,
+                 wait_timeout: float = 15.0, scroll_pause: float = 0.5, max_scrolls: int = 6):
+        self.rate_limiter = rate_limiter
+        self.headless = headless
+        self.wait_timeout = wait_timeout
+        self.scroll_pause = scroll_pause
+        self.max_scrolls = max_scrolls
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+
+    def _driver(self):
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            import undetected_chromedriver as uc
+
+            opts = uc.ChromeOptions()
+            if self.headless:
+                opts.add_argument("--headless=new")
+            opts.add_argument("--lang=en-US")
+            driver = uc.Chrome(options=opts)
+            driver.set_page_load_timeout(self.wait_timeout * 2)
+            self._local.driver = driver
+            with self._drivers_lock:
+                self._drivers.append(driver)
+        return driver
+
+    def _scroll(self, driver):
+        last_height = driver.execute_script("return document.body.scrollHeight")
+        for _ in range(self.max_scrolls):
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            time.sleep(self.scroll_pause)
+            new_height = driver.execute_script("return document.body.scrollHeight")
+            if new_height == last_height:
+                break
+            last_height = new_height
+
+    def fetch(self, url: str) -> str:
+        self.rate_limiter.wait(url)
+        driver = self._driver()
+        driver.get(url)
+        self._scroll(driver)
+        return driver.page_source
+
+    def close(self):
+        with self._drivers_lock:
+            for driver in self._drivers:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            self._drivers.clear()
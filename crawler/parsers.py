@@ -0,0 +1,185 @@
+"""
+Parsers - Trích xuất dữ liệu khóa học từ HTML (không phụ thuộc Selenium)
+Selector giữ nguyên như Crawling.ipynb; chạy được trên HTML đã lưu.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+# Cột output - khớp định dạng data_final_fix.csv (+ curriculum_info gốc)
+FIELDNAMES = [
+    "timestamp", "course_url", "title", "headline", "is_bestseller", "rating",
+    "num_reviews", "num_students", "instructor", "language", "price", "discount",
+    "related_topics", "sections", "lectures", "total_length", "curriculum_info",
+]
+
+COURSE_LINK_SELECTOR = "a.ud-link-neutral.ud-custom-focus-visible"
+
+
+# ================= TEXT PARSERS (giữ nguyên từ notebook) =================
+
+def extract_rating_number(rating_text):
+    if not rating_text:
+        return ""
+    match = re.search(r'(\d+\.\d+|\d+)', rating_text.replace(',', ''))
+    return match.group(1) if match else ""
+
+
+def extract_num_reviews(reviews_text):
+    if not reviews_text:
+        return ""
+    match = re.search(r'\(([\d,]+)\)', reviews_text)
+    return match.group(1) if match else ""
+
+
+def extract_num_students(students_text):
+    if not students_text:
+        return ""
+    match = re.search(r'([\d,]+)', students_text)
+    return match.group(1) if match else ""
+
+
+def extract_discount(discount_text):
+    if not discount_text:
+        return ""
+    match = re.search(r'(\d+)%', discount_text)
+    return f"{match.group(1)}%" if match else ""
+
+
+def extract_price(price_text):
+    """'₫369,000' / 'Current price: ₫369,000' -> '369000.0' (như cột price của data_final_fix.csv)"""
+    if not price_text:
+        return ""
+    match = re.search(r'(\d[\d,.]*)', price_text)
+    if not match:
+        return ""
+    digits = match.group(1).replace(',', '')
+    try:
+        return str(float(digits))
+    except ValueError:
+        return ""
+
+
+def extract_curriculum_stats(curriculum_text) -> Tuple[str, str, str]:
+    """'46 sections • 386 lectures • 42h 44m total length' -> ('46.0', '386.0', '42h 44m')"""
+    if not curriculum_text:
+        return "", "", ""
+    text = curriculum_text.replace(',', '')
+    sections = re.search(r'(\d+)\s*sections?', text)
+    lectures = re.search(r'(\d+)\s*lectures?', text)
+    length = re.search(r'((?:\d+h\s*)?(?:\d+m)?)\s*total length', text)
+    return (
+        f"{float(sections.group(1))}" if sections else "",
+        f"{float(lectures.group(1))}" if lectures else "",
+        length.group(1).strip() if length else "",
+    )
+
+
+# ================= HTML PARSERS =================
+
+def _text(el) -> str:
+    return el.get_text(" ", strip=True) if el is not None else ""
+
+
+def get_text_by_selectors(soup, selectors):
+    for sel in selectors:
+        text = _text(soup.select_one(sel))
+        if text:
+            return text
+    return ""
+
+
+def get_instructor(soup):
+    for sel in ["span.instructor-links--names--fJWIai span.ud-btn-label",
+                "a[href^='#instructor-'] span.ud-btn-label"]:
+        text = _text(soup.select_one(sel))
+        if text:
+            return text.split()[0]
+    return ""
+
+
+def get_related_topics(soup):
+    els = soup.select("div.topic-navigation-module--topic-navigation--wCbdV ul li a")
+    return ", ".join(t for t in (_text(e) for e in els) if t)
+
+
+def get_curriculum_info(soup):
+    return _text(soup.select_one("div.ud-text-sm[data-purpose='curriculum-stats']"))
+
+
+def get_price_info(soup):
+    price_selectors = [
+        "div[data-purpose='course-price-text']",
+        "span.price-text--price-part--Tu6MH",
+        "div.ud-heading-xl",
+        "span.ud-sr-only"
+    ]
+    discount_selectors = [
+        "div[data-purpose='discount-percentage']",
+        "span.discount-percentage",
+        "div.discount-badge"
+    ]
+    price, discount = "", ""
+    for selector in price_selectors:
+        price = next((t for t in (_text(e) for e in soup.select(selector))
+                      if t and any(ch.isdigit() for ch in t)), "")
+        if price:
+            break
+    for selector in discount_selectors:
+        discount = next((extract_discount(t) for t in (_text(e) for e in soup.select(selector))
+                         if t and '%' in t), "")
+        if discount:
+            break
+    return price, discount
+
+
+def parse_course_page(html: str, url: str, timestamp: Optional[str] = None) -> Dict[str, str]:
+    """HTML trang chi tiết khóa học -> một dòng CSV (FIELDNAMES)"""
+    soup = BeautifulSoup(html, "html.parser")
+
+    price_text, discount = get_price_info(soup)
+    curriculum_info = get_curriculum_info(soup)
+    sections, lectures, total_length = extract_curriculum_stats(curriculum_info)
+    bestseller = get_text_by_selectors(soup, ["div[data-purpose='badge']", "div.ribbon-module--ribbon--",
+                                              "div.bestseller-badge"])
+
+    return {
+        "timestamp": timestamp or time.strftime("%Y-%m-%d %H:%M:%S"),
+        "course_url": url,
+        "title": get_text_by_selectors(soup, ["h1[data-purpose='lead-title']", "h1.ud-heading-xxl"]),
+        "headline": get_text_by_selectors(soup, ["div[data-purpose='lead-headline']", "div.ud-text-lg"]),
+        "is_bestseller": "Yes" if bestseller else "No",
+        "rating": extract_rating_number(get_text_by_selectors(
+            soup, ["span[data-purpose='rating-number']", "div.rating-number"])),
+        "num_reviews": extract_num_reviews(get_text_by_selectors(
+            soup, ["button[data-purpose='rating']", "span.ud-text-xs"])),
+        "num_students": extract_num_students(get_text_by_selectors(
+            soup, ["div[data-purpose='enrollment']", "span.students-count"])),
+        "instructor": get_instructor(soup),
+        "language": get_text_by_selectors(soup, ["div[data-purpose='lead-course-locale']", "div.clp-lead__locale"]),
+        "price": extract_price(price_text),
+        "discount": discount,
+        "related_topics": get_related_topics(soup),
+        "sections": sections,
+        "lectures": lectures,
+        "total_length": total_length,
+        "curriculum_info": curriculum_info,
+    }
+
+
+def parse_search_page(html: str, page_url: str) -> List[str]:
+    """HTML trang kết quả tìm kiếm -> danh sách URL khóa học (không trùng, bỏ query string)"""
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    for a in soup.select(COURSE_LINK_SELECTOR):
+        href = a.get("href")
+        if not href or "/course/" not in href:
+            continue
+        link = urljoin(page_url, href).split("?")[0]
+        if link not in links:
+            links.append(link)
+    return links
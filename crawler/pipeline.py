@@ -0,0 +1,155 @@
+"""
+Pipeline - Điều phối crawl song song có checkpoint
+Trang search và trang khóa học được fetch trên cùng một worker pool có giới hạn;
+mỗi khóa học được ghi vào CSV ngay khi parse xong, và checkpoint được cập nhật
+để lần chạy sau bỏ qua những gì đã xong.
+"""
+
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .parsers import FIELDNAMES, parse_course_page, parse_search_page
+from .storage import Checkpoint, CsvSink
+
+DEFAULT_SEARCH_URL = "https://www.udemy.com/courses/search/?q=machine+learning&src=ukw&p={page}"
+
+_SOURCE_COMMENT = re.compile(r"^<!-- source: (\S+) -->")
+
+
+def _html_filename(url: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", url.rstrip("/").split("/")[-1]) or "index"
+    return f"{slug}.html"
+
+
+def save_html(directory: str, url: str, html: str):
+    """Lưu HTML thô (kèm URL nguồn ở dòng đầu) để chạy lại parser offline"""
+    path = Path(directory) / _html_filename(url)
+    path.write_text(f"<!-- source: {url} -->\n{html}", encoding="utf-8")
+
+
+def crawl(fetcher, pages: Iterable[int], out_csv: str, checkpoint_path: str,
+          search_url: str = DEFAULT_SEARCH_URL, workers: int = 4,
+          save_html_dir: Optional[str] = None) -> Dict[str, int]:
+    """
+    Crawl các trang search `pages` và toàn bộ khóa học trong đó.
+
+    - Tối đa `workers` request đồng thời; tối đa `workers` trang search mở cùng lúc
+      nên bộ nhớ không phụ thuộc tổng số trang.
+    - Trang chỉ được đánh dấu xong khi mọi khóa học của nó đã ghi thành công;
+      trang lỗi/trống sẽ được crawl lại ở lần chạy sau (khóa học đã xong thì bỏ qua).
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    sink = CsvSink(out_csv, FIELDNAMES)
+    if save_html_dir:
+        os.makedirs(save_html_dir, exist_ok=True)
+
+    stats = Counter()
+    pages = list(pages)
+    pending_pages = [p for p in pages if p not in checkpoint.pages]
+    stats["pages_skipped"] = len(pages) - len(pending_pages)
+    todo = iter(pending_pages)
+    open_pages, page_remaining, failed_pages, scheduled = set(), {}, set(), set()
+    futures = {}
+
+    def fetch_page(page: int):
+        page_url = search_url.format(page=page)
+        return parse_search_page(fetcher.fetch(page_url), page_url)
+
+    def fetch_course(url: str):
+        html = fetcher.fetch(url)
+        if save_html_dir:
+            save_html(save_html_dir, url, html)
+        return parse_course_page(html, url)
+
+    def finish_page(page: int):
+        open_pages.discard(page)
+        page_remaining.pop(page, None)
+        if page in failed_pages:
+            stats["pages_failed"] += 1
+        else:
+            checkpoint.mark_page(page)
+            stats["pages_done"] += 1
+
+    t0 = time.perf_counter()
+    print(f"🔍 Bắt đầu crawl ({len(checkpoint.pages)} trang, {len(checkpoint.courses)} khóa học đã có trong checkpoint)")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                while len(open_pages) < workers:
+                    page = next(todo, None)
+                    if page is None:
+                        break
+                    open_pages.add(page)
+                    futures[pool.submit(fetch_page, page)] = ("page", page, None)
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, page, url = futures.pop(future)
+                    if kind == "page":
+                        try:
+                            links = future.result()
+                        except Exception as e:
+                            print(f"⚠️  Lỗi khi crawl trang {page}: {e}")
+                            links = None
+                        if not links:
+                            # Trang lỗi hoặc trống (có thể bị chặn): không checkpoint
+                            failed_pages.add(page)
+                            finish_page(page)
+                            continue
+                        new_links = [l for l in links if l not in checkpoint.courses and l not in scheduled]
+                        print(f"📄 Trang {page}: {len(links)} khóa học ({len(new_links)} mới)")
+                        page_remaining[page] = len(new_links)
+                        for link in new_links:
+                            scheduled.add(link)
+                            futures[pool.submit(fetch_course, link)] = ("course", page, link)
+                        if not new_links:
+                            finish_page(page)
+                        continue
+
+                    try:
+                        row = future.result()
+                        sink.write(row)
+                        checkpoint.mark_course(url)
+                        stats["courses_done"] += 1
+                    except Exception as e:
+                        print(f"⚠️  Lỗi khi crawl {url}: {e}")
+                        failed_pages.add(page)
+                        stats["courses_failed"] += 1
+                    finally:
+                        scheduled.discard(url)
+                    page_remaining[page] -= 1
+                    if page_remaining[page] == 0:
+                        finish_page(page)
+    finally:
+        sink.close()
+        checkpoint.close()
+
+    elapsed = time.perf_counter() - t0
+    stats["seconds"] = round(elapsed, 2)
+    print(f"✅ Hoàn thành: {stats['courses_done']} khóa học, {stats['pages_done']} trang "
+          f"({stats['courses_done'] / elapsed if elapsed else 0:.2f} khóa học/s). Dữ liệu lưu tại: {out_csv}")
+    return dict(stats)
+
+
+def parse_saved_html(html_dir: str, out_csv: str) -> int:
+    """Chạy lại parser trên HTML đã lưu (save_html_dir) -> CSV, không cần mạng"""
+    sink = CsvSink(out_csv, FIELDNAMES)
+    count = 0
+    try:
+        for path in sorted(Path(html_dir).glob("*.html")):
+            html = path.read_text(encoding="utf-8")
+            match = _SOURCE_COMMENT.match(html)
+            url = match.group(1) if match else path.stem
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(path.stat().st_mtime))
+            sink.write(parse_course_page(html, url, timestamp=timestamp))
+            count += 1
+    finally:
+        sink.close()
+    return count
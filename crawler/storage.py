@@ -0,0 +1,79 @@
+"""
+Storage - Ghi CSV incremental và checkpoint để resume
+Checkpoint là file JSON-lines chỉ append: mỗi dòng đánh dấu một khóa học hoặc
+một trang search đã xong, nên crash giữa chừng không làm hỏng trạng thái cũ.
+"""
+
+import csv
+import json
+import os
+import threading
+from typing import Dict, List, Set
+
+
+class CsvSink:
+    """Append từng dòng vào CSV ngay khi có (thread-safe, flush mỗi dòng)"""
+
+    def __init__(self, path: str, fieldnames: List[str]):
+        self.path = path
+        self.fieldnames = fieldnames
+        self._lock = threading.Lock()
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8-sig" if new_file else "utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction="ignore")
+        if new_file:
+            self._writer.writeheader()
+            self._file.flush()
+
+    def write(self, row: Dict[str, str]):
+        with self._lock:
+            self._writer.writerow(row)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Checkpoint:
+    """
+    Trạng thái crawl:
+    - {"course": url} : khóa học đã ghi vào CSV
+    - {"page": n}     : trang search đã xong toàn bộ khóa học
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.courses: Set[str] = set()
+        self.pages: Set[int] = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # dòng cuối bị cắt ngang khi crash
+                    if "course" in entry:
+                        self.courses.add(entry["course"])
+                    elif "page" in entry:
+                        self.pages.add(int(entry["page"]))
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _append(self, entry: dict):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def mark_course(self, url: str):
+        with self._lock:
+            self.courses.add(url)
+            self._append({"course": url})
+
+    def mark_page(self, page: int):
+        with self._lock:
+            self.pages.add(page)
+            self._append({"page": page})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,96 @@
+"""
+Fixture server - Phục vụ HTML trong tests/fixtures như một trang Udemy tĩnh
+    /search?p=N      -> fixtures/search_N.html
+    /course/<slug>/  -> fixtures/course_<slug>.html
+URL trong `fail_paths` trả 500 (giả lập trang lỗi để kiểm tra resume).
+
+Usage:
+    python -m crawler.tests.fixture_server --port 8765
+    python -m crawler --fetcher http --search-url "http://127.0.0.1:8765/search?p={page}" \\
+        --pages 1-2 --min-interval 0 --jitter 0
+"""
+
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def fixture_path(request_path: str):
+    parts = urlsplit(request_path)
+    if parts.path == "/search":
+        page = parse_qs(parts.query).get("p", [""])[0]
+        return FIXTURES_DIR / f"search_{page}.html"
+    segments = [s for s in parts.path.split("/") if s]
+    if len(segments) == 2 and segments[0] == "course":
+        return FIXTURES_DIR / f"course_{segments[1]}.html"
+    return None
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """HTTP server chạy trong thread nền; đếm số request theo path"""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.hits = Counter()
+        self.fail_paths = set()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        self.server.hits[path] += 1
+        fixture = fixture_path(self.path)
+        if path in self.server.fail_paths:
+            self.send_error(500)
+            return
+        if fixture is None or not fixture.exists():
+            self.send_error(404)
+            return
+        body = fixture.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server HTML fixture cho crawler")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = FixtureServer(args.port)
+    print(f"Serving {FIXTURES_DIR} at {server.base_url}/search?p={{page}}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
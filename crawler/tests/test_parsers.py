@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from crawler.parsers import (
+    FIELDNAMES,
+    extract_curriculum_stats,
+    extract_price,
+    parse_course_page,
+    parse_search_page,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+BASE_URL = "https://www.udemy.com"
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+def test_parse_search_page_dedupes_and_strips_query():
+    links = parse_search_page(read_fixture("search_1.html"), f"{BASE_URL}/courses/search/?q=python&p=1")
+    assert links == [
+        f"{BASE_URL}/course/python-bootcamp/",
+        f"{BASE_URL}/course/machine-learning-az/",
+    ]
+
+
+def test_parse_course_page_fields():
+    url = f"{BASE_URL}/course/python-bootcamp/"
+    row = parse_course_page(read_fixture("course_python-bootcamp.html"), url, timestamp="2024-01-01 00:00:00")
+    assert list(row) == FIELDNAMES
+    assert row == {
+        "timestamp": "2024-01-01 00:00:00",
+        "course_url": url,
+        "title": "Complete Python Bootcamp",
+        "headline": "Learn Python like a Professional",
+        "is_bestseller": "Yes",
+        "rating": "4.6",
+        "num_reviews": "512,345",
+        "num_students": "1,959,767",
+        "instructor": "Jose",
+        "language": "English",
+        "price": "369000.0",
+        "discount": "81%",
+        "related_topics": "Python, Programming Languages, Development",
+        "sections": "22.0",
+        "lectures": "155.0",
+        "total_length": "22h 13m",
+        "curriculum_info": "22 sections • 155 lectures • 22h 13m total length",
+    }
+
+
+def test_parse_course_page_without_badge_or_discount():
+    row = parse_course_page(read_fixture("course_machine-learning-az.html"), f"{BASE_URL}/course/machine-learning-az/")
+    assert row["is_bestseller"] == "Yes"
+    assert row["discount"] == ""
+    assert row["price"] == "2199000.0"
+
+    row = parse_course_page(read_fixture("course_deep-learning-tensorflow.html"), f"{BASE_URL}/course/x/")
+    assert row["is_bestseller"] == "No"
+    assert (row["sections"], row["lectures"], row["total_length"]) == ("1.0", "12.0", "45m")
+    assert row["language"] == "Vietnamese"
+
+
+def test_text_helpers():
+    assert extract_price("Current price: ₫369,000") == "369000.0"
+    assert extract_price("Free") == ""
+    assert extract_curriculum_stats("10 sections • 80 lectures • 6h total length") == ("10.0", "80.0", "6h")
+    assert extract_curriculum_stats("") == ("", "", "")
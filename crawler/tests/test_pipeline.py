@@ -0,0 +1,84 @@
+import csv
+
+import pytest
+
+from crawler.fetchers import HostRateLimiter, HttpFetcher
+from crawler.parsers import FIELDNAMES
+from crawler.pipeline import crawl
+
+from .fixture_server import FixtureServer
+
+ALL_COURSES = {"python-bootcamp", "machine-learning-az", "deep-learning-tensorflow", "sql-for-analysts"}
+
+
+@pytest.fixture
+def server():
+    server = FixtureServer().start()
+    yield server
+    server.stop()
+
+
+def run_crawl(server, tmp_path, pages=(1, 2)):
+    fetcher = HttpFetcher(HostRateLimiter(min_interval=0, jitter=0), timeout=5)
+    return crawl(
+        fetcher, list(pages),
+        str(tmp_path / "courses.csv"), str(tmp_path / "courses.csv.checkpoint.jsonl"),
+        search_url=server.base_url + "/search?p={page}", workers=3,
+    )
+
+
+def read_rows(tmp_path):
+    with open(tmp_path / "courses.csv", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def course_slugs(rows):
+    return {row["course_url"].rstrip("/").split("/")[-1] for row in rows}
+
+
+def test_crawl_writes_csv_columns(server, tmp_path):
+    stats = run_crawl(server, tmp_path)
+    assert stats["pages_done"] == 2
+    assert stats["courses_done"] == 4
+
+    fieldnames, rows = read_rows(tmp_path)
+    assert fieldnames == FIELDNAMES
+    assert course_slugs(rows) == ALL_COURSES
+    by_slug = {row["course_url"].rstrip("/").split("/")[-1]: row for row in rows}
+    assert by_slug["machine-learning-az"]["total_length"] == "42h 44m"
+    assert by_slug["sql-for-analysts"]["related_topics"] == "SQL, Databases, IT & Software"
+    # Khóa học xuất hiện ở cả 2 trang chỉ được fetch một lần
+    assert server.hits["/course/machine-learning-az/"] == 1
+
+
+def test_rerun_skips_finished_work(server, tmp_path):
+    run_crawl(server, tmp_path)
+    hits_before = sum(server.hits.values())
+
+    stats = run_crawl(server, tmp_path)
+    assert stats["pages_skipped"] == 2
+    assert stats.get("courses_done", 0) == 0
+    assert sum(server.hits.values()) == hits_before
+    assert len(read_rows(tmp_path)[1]) == 4
+
+
+def test_resume_refetches_only_failed_course(server, tmp_path):
+    server.fail_paths.add("/course/sql-for-analysts/")
+    stats = run_crawl(server, tmp_path)
+    assert stats["courses_failed"] == 1
+    assert stats["pages_done"] == 1 and stats["pages_failed"] == 1
+    assert course_slugs(read_rows(tmp_path)[1]) == ALL_COURSES - {"sql-for-analysts"}
+
+    server.fail_paths.clear()
+    server.hits.clear()
+    stats = run_crawl(server, tmp_path)
+    assert stats["pages_skipped"] == 1
+    assert stats["courses_done"] == 1
+    # Trang 2 được crawl lại, nhưng chỉ khóa học lỗi được fetch
+    assert dict(server.hits) == {"/search": 1, "/course/sql-for-analysts/": 1}
+
+    fieldnames, rows = read_rows(tmp_path)
+    assert fieldnames == FIELDNAMES
+    assert course_slugs(rows) == ALL_COURSES
+    assert len(rows) == 4
@@ -30,8 +30,33 @@ export interface PredictionResponse {
   lectures: number;
 }
 
+export type SweepField = keyof PredictionInput;
+
+// values, hoặc range đều start -> stop với num điểm
+export interface SweepAxis {
+  values?: number[];
+  start?: number;
+  stop?: number;
+  num?: number;
+}
+
+export interface PredictionSweepRequest {
+  base: PredictionInput;
+  axes: Partial<Record<SweepField, SweepAxis>>; // 1-3 field, thứ tự = thứ tự chiều
+}
+
+export interface PredictionSweepResponse {
+  axes: { field: SweepField; values: number[] }[];
+  shape: number[];
+  probabilities: number[] | number[][] | number[][][]; // P(Bestseller)
+  scenarios: number;
+  tier: string;
+  elapsed_ms: number;
+}
+
 export interface Stats {
-  total_predictions: number;
+  total_predictions: number;     // Số prediction trong bảng hiện tại
+  archived_predictions?: number; // Số prediction đã chuyển sang archive
   message: string;
 }
 
@@ -68,7 +93,9 @@ export interface RecommendationResponse {
   success: boolean;
   message: string;
   target_topic?: string;
+  target_skill?: string;
   path: string[];
+  path_type?: "skill_graph" | "difficulty";
   total_steps: number;
   steps: RecommendationStep[];
 }
@@ -84,6 +111,17 @@ export interface SearchResponse {
   keyword: string;
 }
 
+export interface SimilarCourse extends Course {
+  similarity: number; // 0.0 - 1.0
+  skills: string[];
+}
+
+export interface SimilarCoursesResponse {
+  course: Course;
+  similar: SimilarCourse[];
+  count: number;
+}
+
 class APIService {
   private baseURL: string;
 
@@ -118,6 +156,24 @@ class APIService {
     return response.json();
   }
 
+  // What-if sweep (không lưu vào database)
+  async predictSweep(request: PredictionSweepRequest): Promise<PredictionSweepResponse> {
+    const response = await fetch(`${this.baseURL}/predict/sweep/`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(request),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(typeof error.detail === 'string' ? error.detail : 'Sweep failed');
+    }
+
+    return response.json();
+  }
+
   // Lấy danh sách predictions
   async getPredictions(skip: number = 0, limit: number = 100): Promise<PredictionResponse[]> {
     const response = await fetch(`${this.baseURL}/predictions/?skip=${skip}&limit=${limit}`);
@@ -232,6 +288,29 @@ class APIService {
 
     return response.json();
   }
+
+  /**
+   * Lấy các khóa học tương tự một khóa học
+   * @param query - course_url hoặc title của khóa học
+   * @param k - Số lượng kết quả (default: 10)
+   * @returns SimilarCoursesResponse với danh sách khóa học tương tự
+   */
+  async getSimilarCourses(
+    query: { course_url?: string; title?: string },
+    k: number = 10
+  ): Promise<SimilarCoursesResponse> {
+    const params = new URLSearchParams({ k: String(k) });
+    if (query.course_url) params.set('course_url', query.course_url);
+    if (query.title) params.set('title', query.title);
+    const response = await fetch(`${this.baseURL}/similar/?${params.toString()}`);
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to fetch similar courses');
+    }
+
+    return response.json();
+  }
 }
 
 // Export singleton instance